@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+
+from argparse import ArgumentParser, RawTextHelpFormatter
+from pathlib import Path
+from textwrap import dedent
+
+from vphasfits.background import background_statistics_from_mef, default_block_rows
+from vphasfits.vphaslib import exit_on_broken_pipe
+
+
+arg_parser = ArgumentParser(
+    prog=f"{Path(__file__).name}",
+    description="Measure sky background and noise of pawprints from MEF image (VPHAS+)",
+    epilog="Copyright (c) https://github.com/pbrus",
+    formatter_class=RawTextHelpFormatter,
+)
+
+arg_parser.add_argument(
+    "image",
+    help=dedent(
+        """\
+    FITS mosaic (MEF)
+    """
+    ),
+    type=str,
+    metavar="filename",
+)
+
+arg_parser.add_argument(
+    "pawprints",
+    help=dedent(
+        """\
+    numbers pointing proper pawprints
+    of the mosaic (from 1 to 32);
+    all pawprints are used by default
+    """
+    ),
+    metavar="pawprint",
+    type=int,
+    nargs="*",
+)
+
+arg_parser.add_argument(
+    "--block-rows",
+    help=dedent(
+        f"""\
+    number of rows read at once
+    (default: {default_block_rows})
+    """
+    ),
+    metavar="N",
+    type=int,
+    default=default_block_rows,
+)
+
+arg_parser.add_argument(
+    "--saturation",
+    help=dedent(
+        """\
+    level of saturated pixels
+    (default: SATURATE key or 65535)
+    """
+    ),
+    metavar="value",
+    type=float,
+    default=None,
+)
+
+arg_parser.add_argument(
+    "--output",
+    help=dedent(
+        """\
+    name of the output file
+    ('-' writes to standard output)
+    """
+    ),
+    metavar="filename",
+    type=str,
+    default=None,
+)
+
+arg_parser.add_argument(
+    "--update-header",
+    help=dedent(
+        """\
+    record the statistics as BKGMED, BKGSIG,
+    BKGRMS, NSATUR, NGOOD and NBAD keys
+    of pawprint headers of the mosaic
+    """
+    ),
+    action="store_true",
+)
+
+args = arg_parser.parse_args()
+
+with exit_on_broken_pipe():
+    background_statistics_from_mef(
+        args.image, args.pawprints or None, args.output, args.block_rows, args.saturation, args.update_header
+    )
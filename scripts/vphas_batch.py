@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+
+from argparse import ArgumentParser, RawTextHelpFormatter
+from pathlib import Path
+from textwrap import dedent
+
+from vphasfits.batch import default_lease_timeout, jobs, run_batch
+
+
+arg_parser = ArgumentParser(
+    prog=f"{Path(__file__).name}",
+    description=dedent(
+        """\
+    Convert many VPHAS+ files sharing the work with other workers.
+    Run the same command on each node using a common work directory."""
+    ),
+    epilog="Copyright (c) https://github.com/pbrus",
+    formatter_class=RawTextHelpFormatter,
+)
+
+arg_parser.add_argument(
+    "job",
+    help=dedent(
+        """\
+    type of the conversion
+    """
+    ),
+    type=str,
+    choices=list(jobs),
+)
+
+arg_parser.add_argument(
+    "workdir",
+    help=dedent(
+        """\
+    directory shared by all workers
+    which stores leases of tasks
+    """
+    ),
+    type=str,
+    metavar="directory",
+)
+
+arg_parser.add_argument(
+    "files",
+    help=dedent(
+        """\
+    input files in FITS format
+    """
+    ),
+    type=str,
+    metavar="filename",
+    nargs="+",
+)
+
+arg_parser.add_argument(
+    "--pawprints",
+    help=dedent(
+        """\
+    numbers of pawprints used by pawprint
+    and srctbl jobs (default: 1-32)
+    """
+    ),
+    metavar="N",
+    type=int,
+    choices=range(1, 33),
+    nargs="+",
+    default=None,
+)
+
+arg_parser.add_argument(
+    "--output-dir",
+    help=dedent(
+        """\
+    directory of the output files
+    (default: next to input files)
+    """
+    ),
+    metavar="directory",
+    type=str,
+    default=None,
+)
+
+arg_parser.add_argument(
+    "--lease-timeout",
+    help=dedent(
+        f"""\
+    seconds after which a lease not refreshed
+    by its owner is taken over (default: {default_lease_timeout:.0f})
+    """
+    ),
+    metavar="seconds",
+    type=float,
+    default=default_lease_timeout,
+)
+
+args = arg_parser.parse_args()
+for output in run_batch(args.job, args.files, args.workdir, args.pawprints, args.output_dir, args.lease_timeout):
+    print(output)
@@ -5,6 +5,7 @@ from pathlib import Path
 from textwrap import dedent
 
 from vphasfits import convert_catalog_fits_to_txt
+from vphasfits.vphaslib import exit_on_broken_pipe
 
 
 arg_parser = ArgumentParser(
@@ -19,6 +20,7 @@ arg_parser.add_argument(
     help=dedent(
         """\
     catalog in FITS format
+    ('-' reads standard input)
     """
     ),
     type=str,
@@ -30,6 +32,35 @@ arg_parser.add_argument(
     help=dedent(
         """\
     name of the output file
+    ('-' writes to standard output)
+    """
+    ),
+    metavar="filename",
+    type=str,
+    default=None,
+)
+
+arg_parser.add_argument(
+    "--stats",
+    help=dedent(
+        """\
+    name of a JSON file with statistics
+    of columns collected during conversion
+    """
+    ),
+    metavar="filename",
+    type=str,
+    default=None,
+)
+
+arg_parser.add_argument(
+    "--checkpoint",
+    help=dedent(
+        """\
+    name of a file recording progress;
+    an interrupted conversion run again
+    with the same file continues from
+    the last recorded row
     """
     ),
     metavar="filename",
@@ -38,4 +69,6 @@ arg_parser.add_argument(
 )
 
 args = arg_parser.parse_args()
-convert_catalog_fits_to_txt(args.catalog, args.output)
+
+with exit_on_broken_pipe():
+    convert_catalog_fits_to_txt(args.catalog, args.output, statistics_json=args.stats, checkpoint=args.checkpoint)
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+
+from argparse import ArgumentParser, RawTextHelpFormatter
+from pathlib import Path
+from textwrap import dedent
+
+from vphasfits.merge import merge_catalogs
+from vphasfits.vphaslib import exit_on_broken_pipe
+
+
+arg_parser = ArgumentParser(
+    prog=f"{Path(__file__).name}",
+    description="Merge overlapping catalog FITS from VPHAS+ project to a single text file",
+    epilog="Copyright (c) https://github.com/pbrus",
+    formatter_class=RawTextHelpFormatter,
+)
+
+arg_parser.add_argument(
+    "catalogs",
+    help=dedent(
+        """\
+    catalogs in FITS format; a source repeated
+    in many catalogs is taken from the first one
+    """
+    ),
+    type=str,
+    nargs="+",
+    metavar="filename",
+)
+
+arg_parser.add_argument(
+    "--output",
+    help=dedent(
+        """\
+    name of the output file
+    ('-' writes to standard output)
+    """
+    ),
+    metavar="filename",
+    type=str,
+    required=True,
+)
+
+arg_parser.add_argument(
+    "--id-key",
+    help=dedent(
+        """\
+    column with identifiers of sources
+    (default: sourceID)
+    """
+    ),
+    metavar="key",
+    type=str,
+    default="sourceID",
+)
+
+arg_parser.add_argument(
+    "--stats",
+    help=dedent(
+        """\
+    name of a JSON file with statistics
+    of the merged columns
+    """
+    ),
+    metavar="filename",
+    type=str,
+    default=None,
+)
+
+args = arg_parser.parse_args()
+
+with exit_on_broken_pipe():
+    merge_catalogs(args.catalogs, args.output, id_key=args.id_key, statistics_json=args.stats)
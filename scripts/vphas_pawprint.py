@@ -4,7 +4,7 @@ from argparse import ArgumentParser, RawTextHelpFormatter
 from pathlib import Path
 from textwrap import dedent
 
-from vphasfits import pawprint_from_mef
+from vphasfits import pawprint_from_mef, pawprint_to_npy
 
 
 arg_parser = ArgumentParser(
@@ -50,5 +50,21 @@ arg_parser.add_argument(
     default=None,
 )
 
+arg_parser.add_argument(
+    "--npy",
+    help=dedent(
+        """\
+    save native-endian float32 pixels to a .npy
+    file (and header keys to a .json file)
+    instead of FITS
+    """
+    ),
+    action="store_true",
+)
+
 args = arg_parser.parse_args()
-pawprint_from_mef(args.image, args.pawprint, args.output)
+
+if args.npy:
+    pawprint_to_npy(args.image, args.pawprint, args.output)
+else:
+    pawprint_from_mef(args.image, args.pawprint, args.output)
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+
+from argparse import ArgumentParser, RawTextHelpFormatter
+from pathlib import Path
+from textwrap import dedent
+
+from vphasfits import mosaic_preview_from_mef
+
+
+arg_parser = ArgumentParser(
+    prog=f"{Path(__file__).name}",
+    description="Make a downsampled preview of all pawprints from MEF image (VPHAS+)",
+    epilog="Copyright (c) https://github.com/pbrus",
+    formatter_class=RawTextHelpFormatter,
+)
+
+arg_parser.add_argument(
+    "image",
+    help=dedent(
+        """\
+    FITS mosaic (MEF)
+    """
+    ),
+    type=str,
+    metavar="filename",
+)
+
+arg_parser.add_argument(
+    "--binning",
+    help=dedent(
+        """\
+    number of pixels binned along each axis
+    (default: 8)
+    """
+    ),
+    metavar="N",
+    type=int,
+    default=8,
+)
+
+arg_parser.add_argument(
+    "--output",
+    help=dedent(
+        """\
+    name of the output file
+    """
+    ),
+    metavar="filename",
+    type=str,
+    default=None,
+)
+
+args = arg_parser.parse_args()
+mosaic_preview_from_mef(args.image, args.binning, args.output)
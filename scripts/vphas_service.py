@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+
+from argparse import ArgumentParser, RawTextHelpFormatter
+from pathlib import Path
+from textwrap import dedent
+
+from vphasfits.service import default_socket_path, run_service
+
+
+arg_parser = ArgumentParser(
+    prog=f"{Path(__file__).name}",
+    description="Run a warm service converting VPHAS+ files (see vphas_submit.py)",
+    epilog="Copyright (c) https://github.com/pbrus",
+    formatter_class=RawTextHelpFormatter,
+)
+
+arg_parser.add_argument(
+    "--socket",
+    help=dedent(
+        f"""\
+    path of the Unix socket
+    (default: {default_socket_path})
+    """
+    ),
+    metavar="path",
+    type=str,
+    default=default_socket_path,
+)
+
+arg_parser.add_argument(
+    "--workers",
+    help=dedent(
+        """\
+    number of jobs running at the same time
+    (default: 4)
+    """
+    ),
+    metavar="N",
+    type=int,
+    default=4,
+)
+
+arg_parser.add_argument(
+    "--cache-size",
+    help=dedent(
+        """\
+    number of FITS files kept open between jobs
+    (default: 16)
+    """
+    ),
+    metavar="N",
+    type=int,
+    default=16,
+)
+
+args = arg_parser.parse_args()
+run_service(args.socket, args.workers, args.cache_size)
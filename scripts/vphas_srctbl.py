@@ -5,6 +5,7 @@ from pathlib import Path
 from textwrap import dedent
 
 from vphasfits import convert_src_table_fits_to_txt
+from vphasfits.vphaslib import exit_on_broken_pipe
 
 
 arg_parser = ArgumentParser(
@@ -19,6 +20,7 @@ arg_parser.add_argument(
     help=dedent(
         """\
     source table in FITS format
+    ('-' reads standard input)
     """
     ),
     type=str,
@@ -43,6 +45,20 @@ arg_parser.add_argument(
     help=dedent(
         """\
     name of the output file
+    ('-' writes to standard output)
+    """
+    ),
+    metavar="filename",
+    type=str,
+    default=None,
+)
+
+arg_parser.add_argument(
+    "--stats",
+    help=dedent(
+        """\
+    name of a JSON file with statistics
+    of columns collected during conversion
     """
     ),
     metavar="filename",
@@ -51,4 +67,6 @@ arg_parser.add_argument(
 )
 
 args = arg_parser.parse_args()
-convert_src_table_fits_to_txt(args.table, args.pawprint, args.output)
+
+with exit_on_broken_pipe():
+    convert_src_table_fits_to_txt(args.table, args.pawprint, args.output, statistics_json=args.stats)
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+
+import json
+import os
+from argparse import ArgumentParser, RawTextHelpFormatter
+from pathlib import Path
+from textwrap import dedent
+
+from vphasfits.service import default_socket_path, send_request, submit_job
+
+
+def absolute_path(filename):
+    return None if filename is None else os.path.abspath(filename)
+
+
+arg_parser = ArgumentParser(
+    prog=f"{Path(__file__).name}",
+    description="Submit a job to the service started by vphas_service.py",
+    epilog="Copyright (c) https://github.com/pbrus",
+    formatter_class=RawTextHelpFormatter,
+)
+
+arg_parser.add_argument(
+    "--socket",
+    help=dedent(
+        f"""\
+    path of the Unix socket
+    (default: {default_socket_path})
+    """
+    ),
+    metavar="path",
+    type=str,
+    default=default_socket_path,
+)
+
+arg_parser.add_argument(
+    "--no-wait",
+    help=dedent(
+        """\
+    return the job identifier without
+    waiting for the end of the job
+    """
+    ),
+    action="store_true",
+)
+
+arg_parser.add_argument(
+    "--keys",
+    help=dedent(
+        """\
+    comma-separated keys or columns used
+    instead of the default ones
+    """
+    ),
+    metavar="keys",
+    type=lambda keys: keys.split(","),
+    default=None,
+)
+
+subparsers = arg_parser.add_subparsers(dest="command", required=True)
+
+pawprint_parser = subparsers.add_parser("pawprint", help="get a pawprint from MEF image")
+pawprint_parser.add_argument("image", help="FITS mosaic (MEF)", metavar="filename")
+pawprint_parser.add_argument("pawprint", help="a number of the pawprint", type=int, choices=range(1, 33))
+pawprint_parser.add_argument("--output", help="name of the output file", metavar="filename", default=None)
+
+srctbl_parser = subparsers.add_parser("srctbl", help="convert source table FITS to a text file")
+srctbl_parser.add_argument("table", help="source table in FITS format", metavar="filename")
+srctbl_parser.add_argument("pawprint", help="a number of the pawprint", type=int, choices=range(1, 33))
+srctbl_parser.add_argument("--output", help="name of the output file", metavar="filename", default=None)
+
+catalog_parser = subparsers.add_parser("catalog", help="convert catalog FITS to a text file")
+catalog_parser.add_argument("catalog", help="catalog in FITS format", metavar="filename")
+catalog_parser.add_argument("--output", help="name of the output file", metavar="filename", default=None)
+
+status_parser = subparsers.add_parser("status", help="get status of a job")
+status_parser.add_argument("id", help="identifier of the job", type=int)
+
+subparsers.add_parser("info", help="get statistics of the service")
+subparsers.add_parser("stop", help="stop the service")
+
+args = arg_parser.parse_args()
+options = {"keys": args.keys, "wait": not args.no_wait, "socket_path": args.socket}
+
+if args.command == "pawprint":
+    response = submit_job("pawprint", absolute_path(args.image), args.pawprint, absolute_path(args.output), **options)
+elif args.command == "srctbl":
+    response = submit_job("srctbl", absolute_path(args.table), args.pawprint, absolute_path(args.output), **options)
+elif args.command == "catalog":
+    response = submit_job("catalog", absolute_path(args.catalog), absolute_path(args.output), **options)
+elif args.command == "status":
+    response = send_request({"action": "status", "id": args.id, "wait": not args.no_wait}, args.socket)
+elif args.command == "info":
+    response = send_request({"action": "info"}, args.socket)
+else:
+    response = send_request({"action": "shutdown"}, args.socket)
+
+print(json.dumps(response, indent=2))
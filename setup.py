@@ -14,6 +14,12 @@ setuptools.setup(
         "scripts/vphas_srctbl.py",
         "scripts/vphas_pawprint.py",
         "scripts/vphas_cat.py",
+        "scripts/vphas_preview.py",
+        "scripts/vphas_batch.py",
+        "scripts/vphas_merge.py",
+        "scripts/vphas_background.py",
+        "scripts/vphas_service.py",
+        "scripts/vphas_submit.py",
     ],
     python_requires=">=3.6",
 )
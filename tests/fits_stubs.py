@@ -1,16 +1,23 @@
 from dataclasses import dataclass
+from types import SimpleNamespace
 from typing import Any, Dict
 
-from numpy import array, dtype, float32, nan
+from astropy.io.fits import BinTableHDU, Column, HDUList
+from astropy.io.fits import Header as FITSHeader
+from astropy.io.fits import PrimaryHDU as FITSPrimaryHDU
+from numpy import array, dtype, float32, full, nan
 
 __all__ = [
     "FITSRecordCatalog",
     "FITSRecordTable",
+    "FITSRecStub",
     "HDUListCatalog",
     "HDUListImgStub",
     "HDUListTable",
     "Header",
     "ImageHDUStub",
+    "MEFStub",
+    "write_catalog_fits",
 ]
 
 NaN = float32(nan)
@@ -28,6 +35,21 @@ src_table_fields = {
     "Aper_flux_3_err": 0.409,
 }
 
+src_table_header = {
+    "CRVAL1": 242.6,
+    "CRVAL2": -1.3,
+    "CRPIX1": 40.0,
+    "CRPIX2": 10.0,
+    "CD1_1": -5.7e-5,
+    "CD1_2": 0.0,
+    "CD2_1": 0.0,
+    "CD2_2": 5.7e-5,
+    "MAGZPT": 25.0,
+    "EXTINCT": 0.1,
+    "EXPTIME": 20.0,
+    "AIRMASS": 1.2,
+}
+
 catalog_fields = {
     "sourceID": "0222b-4-68296",
     "RAJ2000": 275.695,
@@ -108,21 +130,32 @@ class FITSRecordStub:
 
 
 class FITSRecStub:
-    def __init__(self, fields):
+    def __init__(self, fields, records_number=2):
         self.fields = fields
-        self.records_number = 2
+        self.records_number = records_number
 
     def __getitem__(self, i):
+        if isinstance(i, slice):
+            return FITSRecStub(self.fields, len(range(*i.indices(self.records_number))))
+
         if i >= self.records_number:
             raise StopIteration
 
         return FITSRecordStub(self.fields)
 
+    def __len__(self):
+        return self.records_number
+
+    def field(self, key):
+        return array([self.fields[key]] * self.records_number)
+
     def __repr__(self):
         return f"{[self.__getitem__(i) for i in range(self.records_number)]}"
 
 
 class BinTableHDUStub:
+    header = src_table_header
+
     def __init__(self, fields):
         self.data = FITSRecStub(fields)
 
@@ -157,6 +190,9 @@ class Header:
         del self.header[key]
         del self.comments[key]
 
+    def copy(self):
+        return Header(dict(self.header), dict(self.comments))
+
 
 class PrimaryHDUStub:
     header = Header(primary_header, primary_comments)
@@ -179,3 +215,29 @@ FITSRecordTable = FITSRecordStub(src_table_fields)
 FITSRecordCatalog = FITSRecordStub(catalog_fields)
 HDUListTable = HDUListStub(src_table_fields)
 HDUListCatalog = HDUListStub(catalog_fields)
+
+
+class MEFStub(list):
+    """Four 4x6 CCDs forming a 2x2 mosaic; each CCD is filled with its extension number."""
+
+    def __init__(self):
+        super().__init__([SimpleNamespace(header=FITSHeader(primary_header), data=None)])
+        for number, (x, y) in enumerate([(0, 0), (6, 0), (0, 4), (6, 4)], start=1):
+            header = FITSHeader(image_header)
+            header.update({"NAXIS1": 6, "NAXIS2": 4, "CRPIX1": 1.0 - x, "CRPIX2": 1.0 - y})
+            header.update({"CD1_1": 1e-4, "CD1_2": 0.0, "CD2_1": 0.0, "CD2_2": 1e-4})
+            self.append(SimpleNamespace(header=header, data=full((4, 6), number, dtype=dtype(">i4"))))
+
+
+def write_catalog_fits(filename, numbers, nan_every=3):
+    """Write a catalog with a row for each number. Only numbers divisible by nan_every have r magnitudes."""
+    columns = [
+        Column("sourceID", "20A", array=[f"0222b-4-{number}" for number in numbers]),
+        Column("RAJ2000", "D", array=[275.0 + number / 100 for number in numbers]),
+        Column("DEJ2000", "D", array=[-30.0 - number / 100 for number in numbers]),
+        Column("r", "E", array=[nan if number % nan_every else 15.0 + number / 10 for number in numbers]),
+        Column("err_r", "E", array=[number / 1000 for number in numbers]),
+    ]
+    HDUList([FITSPrimaryHDU(), BinTableHDU.from_columns(columns)]).writeto(filename)
+
+    return str(filename)
@@ -0,0 +1,132 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from unittest.mock import patch
+
+import pytest
+
+from vphasfits import vphaslib
+from vphasfits.aio import AsyncConverter, call_unless_cancelled
+from vphasfits.vphaslib import ConversionCancelled, make_catalog_config
+
+from .fits_stubs import write_catalog_fits
+
+
+@pytest.fixture
+def catalog_fits(tmp_path):
+    yield write_catalog_fits(tmp_path / "catalog.fits", range(10))
+
+
+class ConcurrencyCounter:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.running = 0
+        self.maximum = 0
+
+    def __call__(self, value):
+        with self.lock:
+            self.running += 1
+            self.maximum = max(self.maximum, self.running)
+        time.sleep(0.02)
+        with self.lock:
+            self.running -= 1
+        return value
+
+
+def test_run_limits_concurrency():
+    counter = ConcurrencyCounter()
+
+    async def main():
+        converter = AsyncConverter(ThreadPoolExecutor(8), max_concurrency=2)
+        return await asyncio.gather(*[converter.run(counter, (number,)) for number in range(6)])
+
+    assert asyncio.run(main()) == list(range(6))
+    assert counter.maximum == 2
+
+
+def test_converter_reused_by_next_event_loop():
+    counter = ConcurrencyCounter()
+    converter = AsyncConverter(ThreadPoolExecutor(8), max_concurrency=2)
+
+    async def main():
+        return await asyncio.gather(*[converter.run(counter, (number,)) for number in range(4)])
+
+    assert asyncio.run(main()) == list(range(4))
+    assert asyncio.run(main()) == list(range(4))
+    assert counter.maximum == 2
+
+
+def test_convert_catalog_fits_to_txt(catalog_fits, tmp_path):
+    async def main():
+        async with AsyncConverter() as converter:
+            await asyncio.gather(
+                *[
+                    converter.convert_catalog_fits_to_txt(catalog_fits, str(tmp_path / f"{number}.dat"), config)
+                    for number in range(3)
+                ]
+            )
+
+    config = make_catalog_config(["sourceID", "r"], chunk_size=3)
+    asyncio.run(main())
+
+    assert all(len((tmp_path / f"{number}.dat").read_text().splitlines()) == 11 for number in range(3))
+
+
+def test_convert_catalog_fits_to_txt_on_process_pool(catalog_fits, tmp_path):
+    catalog_txt = tmp_path / "catalog.dat"
+
+    async def main():
+        with ProcessPoolExecutor(1) as executor:
+            async with AsyncConverter(executor) as converter:
+                await converter.convert_catalog_fits_to_txt(catalog_fits, str(catalog_txt), config)
+
+    config = make_catalog_config(["sourceID", "r"])
+    asyncio.run(main())
+
+    assert catalog_txt.read_text().splitlines()[1].split() == ["0222b-4-0", "15.0"]
+
+
+def test_cancel_conversion_between_chunks(catalog_fits, tmp_path):
+    catalog_txt, checkpoint = tmp_path / "catalog.dat", tmp_path / "catalog.ckpt"
+    config = make_catalog_config(["sourceID", "r"], chunk_size=2)
+    started, release = threading.Event(), threading.Event()
+    format_chunk = vphaslib.format_chunk
+
+    def blocking_format_chunk(*args):
+        started.set()
+        release.wait(5)
+        return format_chunk(*args)
+
+    async def main():
+        converter = AsyncConverter(max_concurrency=1)
+        task = asyncio.ensure_future(
+            converter.convert_catalog_fits_to_txt(catalog_fits, str(catalog_txt), config, checkpoint=str(checkpoint))
+        )
+        queued = asyncio.ensure_future(
+            converter.convert_catalog_fits_to_txt(catalog_fits, str(tmp_path / "queued.dat"), config)
+        )
+        await asyncio.get_event_loop().run_in_executor(None, started.wait, 5)
+        task.cancel()
+        queued.cancel()
+        release.set()
+
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        with pytest.raises(asyncio.CancelledError):
+            await queued
+
+    with patch("vphasfits.vphaslib.format_chunk", blocking_format_chunk):
+        asyncio.run(main())
+
+    assert len(catalog_txt.read_text().splitlines()) == 3
+    assert checkpoint.exists()
+    assert not (tmp_path / "queued.dat").exists()
+
+
+def test_call_unless_cancelled():
+    event = threading.Event()
+    event.set()
+
+    with pytest.raises(ConversionCancelled):
+        call_unless_cancelled(print, event, (), {})
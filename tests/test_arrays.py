@@ -0,0 +1,84 @@
+from unittest.mock import patch
+
+import pytest
+from numpy import array, concatenate, degrees, float32, isnan
+from numpy.testing import assert_allclose, assert_array_equal
+
+from vphasfits.arrays import iter_catalog_chunks, iter_source_table_chunks, read_catalog, read_source_table
+from vphasfits.vphaslib import make_catalog_config, make_sky_columns, make_src_table_config
+
+from .fits_stubs import HDUListTable, write_catalog_fits
+
+
+@pytest.fixture
+def catalog_fits(tmp_path):
+    yield write_catalog_fits(tmp_path / "catalog.fits", range(7))
+
+
+@pytest.fixture
+def fits_src_table_open_mock():
+    with patch("vphasfits.vphaslib.fits.open") as mock:
+        mock.return_value.__enter__.return_value = HDUListTable
+        yield mock
+
+
+def test_read_catalog_returns_native_endian_arrays(catalog_fits):
+    catalog = read_catalog(catalog_fits, ["sourceID", "RAJ2000", "r"])
+
+    assert catalog.dtype.names == ("sourceID", "RAJ2000", "r")
+    assert all(catalog.dtype[key].isnative for key in ["RAJ2000", "r"])
+    assert catalog["sourceID"][1] == "0222b-4-1"
+    assert_allclose(catalog["RAJ2000"][:2], [275.0, 275.01])
+    assert_allclose(catalog["r"][:4], [15.0, 99.9999, 99.9999, 15.3])
+
+
+def test_read_catalog_keeps_nan(catalog_fits):
+    catalog = read_catalog(catalog_fits, ["r"], nan_value=None, as_dict=True)
+
+    assert list(catalog) == ["r"]
+    assert catalog["r"].dtype == float32
+    assert_array_equal(isnan(catalog["r"][:4]), [False, True, True, False])
+
+
+def test_read_catalog_passing_config(catalog_fits):
+    catalog = read_catalog(catalog_fits, config=make_catalog_config(["err_r", "r"], nan_value=-1.0))
+
+    assert catalog.dtype.names == ("err_r", "r")
+    assert catalog["r"][1] == -1.0
+
+
+@pytest.mark.parametrize("chunk_size, chunks", [(1, 7), (3, 3), (100, 1)])
+def test_iter_catalog_chunks(catalog_fits, chunk_size, chunks):
+    result = list(iter_catalog_chunks(catalog_fits, ["sourceID", "r"], chunk_size=chunk_size))
+
+    assert len(result) == chunks
+    assert_array_equal(concatenate(result), read_catalog(catalog_fits, ["sourceID", "r"]))
+
+
+def test_read_catalog_does_not_write_files(catalog_fits, tmp_path):
+    read_catalog(catalog_fits, ["sourceID", "RAJ2000", "DEJ2000", "r", "err_r"])
+
+    assert [path.name for path in tmp_path.iterdir()] == ["catalog.fits"]
+
+
+def test_read_source_table(fits_src_table_open_mock):
+    table = read_source_table("file.fits", 1, ["Sequence_number", "RA", "DEC"], as_dict=True)
+
+    assert list(table) == ["Sequence_number", "RA", "DEC"]
+    assert_allclose(table["RA"], degrees([4.235, 4.235]))
+    assert_allclose(table["DEC"], degrees([-0.023, -0.023]))
+
+
+def test_read_source_table_with_sky_columns(fits_src_table_open_mock):
+    config = make_src_table_config(["Sequence_number"], derived=[make_sky_columns()])
+    table = read_source_table("file.fits", 1, config=config)
+
+    assert table.dtype.names == ("Sequence_number", "RA_TAN", "DEC_TAN")
+    assert_allclose(table["RA_TAN"], [242.5998213, 242.5998213])
+
+
+def test_iter_source_table_chunks(fits_src_table_open_mock):
+    chunks = list(iter_source_table_chunks("file.fits", 1, ["Peak_height"], chunk_size=1))
+
+    assert [len(chunk) for chunk in chunks] == [1, 1]
+    assert_allclose(concatenate(chunks)["Peak_height"], array([83.348, 83.348]))
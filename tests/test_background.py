@@ -0,0 +1,106 @@
+import pytest
+from astropy.io import fits
+from astropy.io.fits import HDUList, Header, ImageHDU, PrimaryHDU
+from numpy import float32, inf, nan, ones
+from numpy.random import default_rng
+
+from vphasfits.background import (
+    PixelHistogram,
+    add_background_keys,
+    background_statistics_from_mef,
+    get_background_statistics,
+    make_txt_background_filename,
+)
+
+
+@pytest.fixture
+def mef(tmp_path):
+    filename = str(tmp_path / "0800b.fits")
+    generator = default_rng(7)
+    data = generator.normal(400.0, 12.0, (300, 200)).astype(float32)
+    data[:5, :4] = 66000.0
+    data[100, :] = nan
+    data[101, :3] = inf
+    stars = generator.integers(0, data.size, 300)
+    data.flat[stars] += generator.uniform(200.0, 5000.0, 300).astype(float32)
+    image = ImageHDU(data)
+    image.header["SATURATE"] = 60000.0
+    HDUList([PrimaryHDU(), image, ImageHDU(ones((30, 20), dtype=float32) * 250.0)]).writeto(filename)
+    yield filename
+
+
+@pytest.mark.parametrize(
+    "fits, result",
+    [
+        ("0800b.fits", "0800b-bkg.dat"),
+        ("0800b", "0800b-bkg.dat"),
+    ],
+)
+def test_make_txt_background_filename(fits, result):
+    assert make_txt_background_filename(fits) == result
+
+
+def test_pixel_histogram_percentiles():
+    histogram = PixelHistogram((0.0, 10.0), 1.0)
+    histogram.update(ones(4) * [0.5, 1.5, 2.5, 3.5])
+    histogram.update(ones(1) * -5.0)
+
+    assert histogram.counts.tolist()[:5] == [1, 1, 1, 1, 1]
+    assert histogram.percentiles([0.0, 50.0, 62.5, 100.0], 1, 11).tolist() == [0.0, 2.0, 2.5, 4.0]
+
+
+def test_pixel_histogram_of_constant_values():
+    histogram = PixelHistogram((0.0, 10.0), 0.25)
+    histogram.update(ones(5) * 2.0)
+
+    assert histogram.clipped_statistics() == (2.0, 0.0, 0.0)
+
+
+@pytest.mark.parametrize("block_rows", [1, 64, 1000])
+def test_get_background_statistics(mef, block_rows):
+    statistics = get_background_statistics(mef, 1, block_rows)
+
+    assert statistics["BKGMED"] == pytest.approx(400.0, abs=0.3)
+    assert statistics["BKGSIG"] == pytest.approx(12.0, abs=0.3)
+    assert statistics["BKGRMS"] == pytest.approx(12.0, abs=0.5)
+    assert statistics["NSATUR"] == 20
+    assert statistics["NGOOD"] == 300 * 200 - 203
+    assert statistics["NBAD"] == 203
+
+
+def test_get_background_statistics_passing_saturation(mef):
+    assert get_background_statistics(mef, 1, saturation=1000.0)["NSATUR"] > 20
+    assert get_background_statistics(mef, 2)["BKGMED"] == 250.0
+
+
+def test_add_background_keys(mef):
+    header = Header()
+    add_background_keys(header, get_background_statistics(mef, 2))
+
+    assert header["NGOOD"] == 600
+    assert header.comments["NSATUR"] == "Number of saturated pixels"
+
+
+def test_background_statistics_from_mef(mef, tmp_path):
+    statistics = background_statistics_from_mef(mef)
+    lines = (tmp_path / "0800b-bkg.dat").read_text().splitlines()
+
+    assert len(statistics) == 2
+    assert lines[0] == "# Pawprint BKGMED BKGSIG BKGRMS NSATUR NGOOD NBAD"
+    assert lines[2].split() == ["2", "250.000", "0.000", "0.000", "0", "600", "0"]
+
+
+def test_background_statistics_from_mef_updating_header(mef, tmp_path):
+    background_statistics_from_mef(mef, [2], str(tmp_path / "output.dat"), update_header=True)
+
+    with fits.open(mef) as hdu_descriptor:
+        assert hdu_descriptor[2].header["BKGMED"] == 250.0
+        assert hdu_descriptor[2].header["NGOOD"] == 600
+        assert "BKGMED" not in hdu_descriptor[1].header
+
+
+def test_background_statistics_from_mef_passing_pawprints(mef, tmp_path):
+    output = tmp_path / "output.dat"
+    background_statistics_from_mef(mef, [2], str(output))
+
+    assert len(output.read_text().splitlines()) == 2
@@ -0,0 +1,118 @@
+import json
+import multiprocessing
+import os
+from time import sleep, time
+from unittest.mock import patch
+
+import pytest
+
+from vphasfits.batch import Task, make_tasks, run_batch
+
+
+def fake_convert(input_filename, pawprint, output_filename, config):
+    sleep(0.01)
+    with open(f"{os.path.dirname(output_filename)}/calls.log", "a") as log:
+        log.write(f"{input_filename}\n")
+    with open(output_filename, "w") as file_descriptor:
+        file_descriptor.write(f"{input_filename} {os.getpid()}\n")
+
+
+def failing_convert(input_filename, pawprint, output_filename, config):
+    with open(output_filename, "w") as file_descriptor:
+        file_descriptor.write("partial")
+    raise OSError("disk full")
+
+
+@pytest.fixture
+def catalog_job_mock():
+    with patch.dict("vphasfits.batch.jobs", {"catalog": (fake_convert, lambda name, _: f"{name}.txt")}):
+        yield
+
+
+@pytest.fixture
+def inputs(tmp_path):
+    yield [str(tmp_path / f"catalog{number}.fits") for number in range(20)]
+
+
+# -------------------------------- TESTS --------------------------------
+
+
+def test_make_tasks():
+    tasks = make_tasks("srctbl", ["a.fits", "b.fits"], [1, 2])
+
+    assert tasks == [
+        Task("srctbl", "a.fits", 1),
+        Task("srctbl", "a.fits", 2),
+        Task("srctbl", "b.fits", 1),
+        Task("srctbl", "b.fits", 2),
+    ]
+    assert len({task.name for task in tasks}) == 4
+    assert len(make_tasks("pawprint", ["a.fits"])) == 32
+
+
+def test_make_tasks_unknown_job():
+    with pytest.raises(ValueError):
+        make_tasks("spectrum", ["a.fits"])
+
+
+def test_run_batch_in_many_processes(catalog_job_mock, inputs, tmp_path):
+    output_dir = tmp_path / "output"
+    output_dir.mkdir()
+    arguments = [("catalog", inputs, str(tmp_path / "work"), None, str(output_dir))] * 4
+
+    with multiprocessing.get_context("fork").Pool(4) as pool:
+        results = pool.starmap(run_batch, arguments)
+
+    outputs = [output for result in results for output in result]
+    assert sorted(outputs) == sorted(str(output_dir / f"catalog{number}.fits.txt") for number in range(20))
+    assert len((output_dir / "calls.log").read_text().splitlines()) == 20
+    assert not list((tmp_path / "work").glob("*.lease"))
+    assert not list(output_dir.glob(".*.tmp"))
+
+
+def test_run_batch_skips_finished_and_leased_tasks(catalog_job_mock, inputs, tmp_path):
+    work_dir = tmp_path / "work"
+    run_batch("catalog", inputs[:2], str(work_dir))
+    (work_dir / f"{Task('catalog', inputs[2]).name}.lease").write_text("{}")
+
+    assert run_batch("catalog", inputs[:3], str(work_dir)) == []
+
+
+def test_run_batch_reclaims_stale_lease(catalog_job_mock, inputs, tmp_path):
+    work_dir = tmp_path / "work"
+    work_dir.mkdir()
+    lease = work_dir / f"{Task('catalog', inputs[0]).name}.lease"
+    lease.write_text(json.dumps({"token": "dead"}))
+    os.utime(lease, (time() - 100, time() - 100))
+
+    assert run_batch("catalog", inputs[:1], str(work_dir), lease_timeout=10.0) == [f"{inputs[0]}.txt"]
+    assert list(work_dir.iterdir()) == [work_dir / f"{Task('catalog', inputs[0]).name}.done"]
+
+
+def test_run_batch_failing_task_releases_lease(inputs, tmp_path):
+    work_dir = tmp_path / "work"
+
+    with patch.dict("vphasfits.batch.jobs", {"catalog": (failing_convert, lambda name, _: f"{name}.txt")}):
+        assert run_batch("catalog", inputs[:1], str(work_dir)) == []
+
+    marker = work_dir / f"{Task('catalog', inputs[0]).name}.failed"
+    assert list(work_dir.iterdir()) == [marker]
+    assert json.loads(marker.read_text())["error"] == "OSError: disk full"
+    assert list(tmp_path.iterdir()) == [work_dir]
+
+
+def test_run_batch_continues_after_broken_input(inputs, tmp_path):
+    work_dir = tmp_path / "work"
+    broken = inputs[1]
+
+    def convert(input_filename, pawprint, output_filename, config):
+        if input_filename == broken:
+            raise ValueError("Empty or corrupt FITS file")
+        fake_convert(input_filename, pawprint, output_filename, config)
+
+    with patch.dict("vphasfits.batch.jobs", {"catalog": (convert, lambda name, _: f"{name}.txt")}):
+        outputs = run_batch("catalog", inputs[:3], str(work_dir))
+        assert run_batch("catalog", inputs[:3], str(work_dir)) == []
+
+    assert outputs == [f"{inputs[0]}.txt", f"{inputs[2]}.txt"]
+    assert sorted(path.suffix for path in work_dir.iterdir()) == [".done", ".done", ".failed"]
@@ -0,0 +1,79 @@
+import json
+
+import pytest
+from numpy import array
+
+from vphasfits.merge import SourceIDIndex, hash_keys, merge_catalogs
+from vphasfits.vphaslib import make_catalog_config
+
+from .fits_stubs import write_catalog_fits
+
+
+@pytest.fixture
+def catalogs(tmp_path):
+    yield [
+        write_catalog_fits(tmp_path / "field1.fits", range(0, 10), nan_every=4),
+        write_catalog_fits(tmp_path / "field2.fits", range(6, 15), nan_every=4),
+        write_catalog_fits(tmp_path / "field3.fits", [3, 20, 14, 21], nan_every=4),
+    ]
+
+
+def test_hash_keys_is_fnv1a():
+    assert hash_keys(array([b"a", b""], dtype="S1")).tolist() == [0xAF63DC4C8601EC8C, 0xAF63BD4C8601B7DF]
+
+
+def test_source_id_index_marks_first_occurrences():
+    index = SourceIDIndex(capacity=2)
+
+    assert index.add(["0222b-4-1", "0222b-4-2", "0222b-4-1"]).tolist() == [True, True, False]
+    assert index.add(["0222b-4-2", "0222b-4-3"]).tolist() == [False, True]
+    assert len(index) == 3
+
+
+def test_source_id_index_grows_and_widens_keys():
+    index = SourceIDIndex(capacity=2)
+    index.add([f"id-{number}" for number in range(100)])
+
+    assert index.add(["id-5", "a-much-longer-identifier-7", "id-100"]).tolist() == [False, True, True]
+    assert index.add([b"id-99", b"a-much-longer-identifier-7"]).tolist() == [False, False]
+    assert len(index) == 102
+    assert index.capacity >= 2 * len(index)
+
+
+def test_source_id_index_matches_set():
+    identifiers = [f"0704a-{number % 32}-{number * 7919 % 5003}" for number in range(20000)]
+    index, seen, expected = SourceIDIndex(), set(), []
+    for identifier in identifiers:
+        expected.append(identifier not in seen)
+        seen.add(identifier)
+
+    chunks = [identifiers[first : first + 3000] for first in range(0, len(identifiers), 3000)]
+    result = [flag for chunk in chunks for flag in index.add(chunk)]
+
+    assert result == expected
+    assert len(index) == len(seen)
+
+
+@pytest.mark.parametrize("chunk_size", [1, 4, 1000])
+def test_merge_catalogs(catalogs, tmp_path, chunk_size):
+    catalog_txt = tmp_path / "merged-cat.dat"
+    config = make_catalog_config(["sourceID", "r"], chunk_size=chunk_size)
+
+    assert merge_catalogs(catalogs, str(catalog_txt), config) == 17
+
+    lines = catalog_txt.read_text().splitlines()
+    identifiers = [line.split()[0] for line in lines[1:]]
+    assert lines[0] == "# sourceID r"
+    assert identifiers == [f"0222b-4-{number}" for number in list(range(15)) + [20, 21]]
+    assert lines[1].split()[1] == "15.0" and lines[2].split()[1] == "99.9999"
+
+
+def test_merge_catalogs_without_id_column_in_output(catalogs, tmp_path):
+    catalog_txt, statistics_json = tmp_path / "merged-cat.dat", tmp_path / "merged.json"
+    merge_catalogs(catalogs, str(catalog_txt), make_catalog_config(["RAJ2000"]), statistics_json=str(statistics_json))
+    statistics = json.loads(statistics_json.read_text())
+
+    assert len(catalog_txt.read_text().splitlines()) == 18
+    assert statistics["rows"] == 17
+    assert statistics["duplicates"] == 6
+    assert statistics["inputs"] == catalogs
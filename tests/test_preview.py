@@ -0,0 +1,71 @@
+from unittest.mock import patch
+
+import pytest
+from numpy import arange, array, isnan
+
+from vphasfits.preview import block_bin, create_mosaic_preview, make_preview_fits_filename, mosaic_preview_from_mef
+
+from .fits_stubs import MEFStub
+
+
+@pytest.fixture
+def fits_mef_open_mock():
+    with patch("vphasfits.preview.fits.open") as mock:
+        mock.return_value.__enter__.return_value = MEFStub()
+        yield mock
+
+
+@pytest.fixture
+def create_mosaic_preview_mock():
+    with patch("vphasfits.preview.create_mosaic_preview") as mock:
+        yield mock
+
+
+# -------------------------------- TESTS --------------------------------
+
+
+@pytest.mark.parametrize(
+    "fits, result",
+    [
+        ("ADP.2019-10-07T14:31:52.250.fits", "ADP.2019-10-07T14:31:52.250-preview.fits"),
+        ("MULTI-MATRIX", "MULTI-MATRIX-preview.fits"),
+        (r"/path/to/MEF_file.fits", r"/path/to/MEF_file-preview.fits"),
+    ],
+)
+def test_make_preview_fits_filename(fits, result):
+    assert make_preview_fits_filename(fits) == result
+
+
+def test_block_bin_trims_incomplete_blocks():
+    data = arange(20).reshape(4, 5)
+
+    assert (block_bin(data, 2) == array([[3.0, 5.0], [13.0, 15.0]])).all()
+
+
+def test_create_mosaic_preview(fits_mef_open_mock):
+    preview = create_mosaic_preview("mef.fits", 2)
+    result = array([[1, 1, 1, 2, 2, 2], [1, 1, 1, 2, 2, 2], [3, 3, 3, 4, 4, 4], [3, 3, 3, 4, 4, 4]])
+
+    assert (preview.data == result).all()
+    assert preview.header["OBJECT"] == "M13-preview"
+    assert preview.header["CRPIX1"] == pytest.approx(0.75)
+    assert preview.header["CD2_2"] == pytest.approx(2e-4)
+
+
+def test_create_mosaic_preview_uncovered_pixels_are_nan(fits_mef_open_mock):
+    preview = create_mosaic_preview("mef.fits", 4)
+
+    assert preview.data.shape == (2, 3)
+    assert isnan(preview.data[:, 2]).all()
+
+
+def test_mosaic_preview_from_mef_default_output_filename(create_mosaic_preview_mock):
+    mosaic_preview_from_mef("mef.fits", 4)
+
+    create_mosaic_preview_mock.assert_called_once_with("mef.fits", 4)
+    create_mosaic_preview_mock.return_value.writeto.assert_called_once_with("mef-preview.fits")
+
+
+def test_mosaic_preview_from_mef_invalid_binning(create_mosaic_preview_mock):
+    with pytest.raises(ValueError):
+        mosaic_preview_from_mef("mef.fits", 0)
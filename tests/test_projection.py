@@ -0,0 +1,24 @@
+import pytest
+from astropy.wcs import WCS
+from numpy import array
+
+from vphasfits.projection import pixel_to_sky
+
+
+@pytest.mark.parametrize(
+    "wcs",
+    [
+        {"CRVAL1": 275.0, "CRVAL2": -30.0, "CD1_1": -5.7e-5, "CD1_2": 1e-6, "CD2_1": 2e-6, "CD2_2": 5.7e-5},
+        {"CRVAL1": 0.01, "CRVAL2": 1.2, "CD1_1": 5.7e-5, "CD1_2": 0.0, "CD2_1": 0.0, "CD2_2": 5.7e-5},
+        {"CRVAL1": 180.0, "CRVAL2": 89.9, "CD1_1": -1e-4, "CD1_2": 3e-5, "CD2_1": -3e-5, "CD2_2": 1e-4},
+    ],
+)
+def test_pixel_to_sky_matches_astropy(wcs):
+    wcs = dict(wcs, CRPIX1=1024.0, CRPIX2=2048.0)
+    x, y = array([1.0, 1024.0, 2048.0, 500.5]), array([1.0, 2048.0, 4096.0, 3000.25])
+    reference = WCS(dict(wcs, CTYPE1="RA---TAN", CTYPE2="DEC--TAN"))
+    ra, dec = pixel_to_sky(x, y, wcs)
+    expected_ra, expected_dec = reference.all_pix2world(x, y, 1)
+
+    assert ra == pytest.approx(expected_ra, abs=1e-9)
+    assert dec == pytest.approx(expected_dec, abs=1e-9)
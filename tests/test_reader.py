@@ -0,0 +1,100 @@
+import pytest
+from numpy import isnan
+
+from vphasfits.reader import (
+    iter_catalog_txt_chunks,
+    read_catalog_txt,
+    read_src_table_txt,
+    split_fixed_width_rows,
+)
+
+catalog_row = (
+    "  0222b-4-68296    18:22:46.800    -30:48:43.20         99.9999         99.9999          22.754"
+    "           0.163          20.495           0.091          19.827           0.101          20.047"
+    "           0.059          19.147           0.053\n"
+)
+
+src_table_row = (
+    "         1.0 16:10:35.430 -01:19:04.09       43.135       12.938       83.348        0.305       15.913"
+    "        0.409\n"
+)
+
+
+@pytest.fixture
+def catalog_txt(tmp_path):
+    filename = tmp_path / "catalog-cat.dat"
+    header = "# sourceID RAJ2000 DEJ2000 u err_u g err_g r2 err_r2 ha err_ha r err_r i err_i\n"
+    filename.write_text(header + catalog_row * 5)
+    yield str(filename)
+
+
+@pytest.fixture
+def src_table_txt(tmp_path):
+    filename = tmp_path / "table-p1-srctbl.dat"
+    header = (
+        "# Sequence_number RA DEC X_coordinate Y_coordinate "
+        "Peak_height Peak_height_err Aper_flux_3 Aper_flux_3_err\n"
+    )
+    overflow_row = src_table_row.replace("      83.348", " 1.2345678e+07")
+    filename.write_text(header + src_table_row + overflow_row)
+    yield str(filename)
+
+
+# -------------------------------- TESTS --------------------------------
+
+
+def test_split_fixed_width_rows():
+    cells = split_fixed_width_rows(b"  1   2\n  3   4\n", 2, 3)
+
+    assert cells.shape == (2, 2, 3)
+    assert bytes(cells[1, 0]) == b"  3"
+
+
+@pytest.mark.parametrize("block", [b"  1   2\n  3    4\n", b"  1   2 \n  3   4\n"])
+def test_split_fixed_width_rows_not_matching_width(block):
+    assert split_fixed_width_rows(block, 2, 3) is None
+
+
+def test_read_catalog_txt(catalog_txt):
+    catalog = read_catalog_txt(catalog_txt)
+
+    assert len(catalog) == 5
+    assert catalog["sourceID"][0] == "0222b-4-68296"
+    assert catalog["RAJ2000"][0] == pytest.approx(275.695)
+    assert catalog["DEJ2000"][0] == pytest.approx(-30.812)
+    assert isnan(catalog["u"]).all()
+    assert catalog["err_i"][4] == pytest.approx(0.053)
+
+
+def test_read_catalog_txt_without_nan_value(catalog_txt):
+    catalog = read_catalog_txt(catalog_txt, nan_value=None)
+
+    assert (catalog["err_u"] == 99.9999).all()
+
+
+@pytest.mark.parametrize("chunk_rows, lengths", [(1, [1, 1, 1, 1, 1]), (2, [2, 2, 1]), (10, [5])])
+def test_iter_catalog_txt_chunks(catalog_txt, chunk_rows, lengths):
+    assert [len(chunk) for chunk in iter_catalog_txt_chunks(catalog_txt, chunk_rows)] == lengths
+
+
+def test_read_src_table_txt_with_wide_values(src_table_txt):
+    table = read_src_table_txt(src_table_txt)
+
+    assert table["RA"] == pytest.approx([242.647625, 242.647625])
+    assert table["DEC"] == pytest.approx([-1.317803, -1.317803])
+    assert list(table["Peak_height"]) == [83.348, 1.2345678e07]
+
+
+def test_read_src_table_txt_invalid_coordinates(tmp_path):
+    filename = tmp_path / "table.dat"
+    filename.write_text("# RA DEC\n000nan:nan:000nan +nan:nan:00nan\n")
+    table = read_src_table_txt(str(filename))
+
+    assert isnan(table["RA"][0]) and isnan(table["DEC"][0])
+
+
+def test_read_catalog_txt_empty_file(tmp_path):
+    filename = tmp_path / "empty-cat.dat"
+    filename.write_text("# sourceID r\n")
+
+    assert read_catalog_txt(str(filename)).dtype.names == ("sourceID", "r")
@@ -0,0 +1,101 @@
+from threading import Event, Thread
+from unittest.mock import Mock, patch
+
+import pytest
+
+from vphasfits import vphaslib
+from vphasfits.service import ConversionService, send_request, submit_job
+from vphasfits.vphaslib import make_catalog_config
+
+
+@pytest.fixture
+def catalog_job_mock():
+    mock = Mock()
+    with patch.dict("vphasfits.service.jobs", {"catalog": (mock, make_catalog_config)}):
+        yield mock
+
+
+@pytest.fixture
+def socket_path(tmp_path):
+    path = str(tmp_path / "service.sock")
+    service = ConversionService(path, workers=2, cache_size=2)
+    thread = Thread(target=service.serve_forever, args=(0.05,))
+    thread.start()
+    yield path
+    service.shutdown()
+    service.server_close()
+    thread.join()
+
+
+# -------------------------------- TESTS --------------------------------
+
+
+def test_submit_job(catalog_job_mock, socket_path):
+    response = submit_job("catalog", "/data/catalog.fits", "/data/catalog.txt", socket_path=socket_path)
+
+    catalog_job_mock.assert_called_once_with("/data/catalog.fits", "/data/catalog.txt")
+    assert response["status"] == "done"
+    assert response["run_time"] >= 0.0
+    assert response["wait_time"] >= 0.0
+
+
+def test_submit_job_reuses_config(catalog_job_mock, socket_path):
+    for _ in range(2):
+        submit_job("catalog", "/data/catalog.fits", keys=["sourceID", "r"], socket_path=socket_path)
+
+    first, second = [call[1]["config"] for call in catalog_job_mock.call_args_list]
+    assert first.keys == ("sourceID", "r")
+    assert first is second
+
+
+def test_submit_failing_job(catalog_job_mock, socket_path):
+    catalog_job_mock.side_effect = FileNotFoundError("catalog.fits")
+    response = submit_job("catalog", "catalog.fits", socket_path=socket_path)
+
+    assert response["status"] == "failed"
+    assert response["error"] == "FileNotFoundError: catalog.fits"
+
+
+def test_job_status(catalog_job_mock, socket_path):
+    job_id = submit_job("catalog", "catalog.fits", wait=False, socket_path=socket_path)["id"]
+    response = send_request({"action": "status", "id": job_id, "wait": True}, socket_path)
+
+    assert response["id"] == job_id
+    assert response["status"] == "done"
+
+
+@pytest.mark.parametrize(
+    "message, error",
+    [
+        ({"action": "submit", "job": "spectrum"}, "ValueError: Unknown job 'spectrum'"),
+        ({"action": "status", "id": 100}, "ValueError: Unknown job identifier 100"),
+        ({"action": "restart"}, "ValueError: Unknown action 'restart'"),
+    ],
+)
+def test_invalid_requests(socket_path, message, error):
+    response = send_request(message, socket_path)
+
+    assert response["status"] == "error"
+    assert response["error"].startswith(error)
+
+
+def test_service_enables_cache(socket_path):
+    response = send_request({"action": "info"}, socket_path)
+
+    assert vphaslib.fits_cache is not None
+    assert response["cache"]["maxsize"] == 2
+
+
+def test_history_keeps_queued_jobs(catalog_job_mock, tmp_path):
+    release = Event()
+    catalog_job_mock.side_effect = lambda: release.wait(5.0)
+    service = ConversionService(str(tmp_path / "history.sock"), workers=1)
+
+    with patch("vphasfits.service.max_history", 2):
+        job_ids = [service.submit("catalog", [], {}, None) for _ in range(4)]
+        release.set()
+        service.status(job_ids[-1], block=True)
+        service.server_close()
+
+    assert catalog_job_mock.call_count == 4
+    assert [service.status(job_id)["status"] for job_id in job_ids] == ["done"] * 4
@@ -0,0 +1,66 @@
+import json
+
+import pytest
+from numpy import array, float32, nan, pi
+
+from vphasfits.statistics import ColumnStatistics
+
+
+@pytest.fixture
+def statistics():
+    yield ColumnStatistics(
+        ["id", "ra", "dec", "r", "err_r"], ("ra", "dec"), "radian", ["r"], histogram_edges=[10.0, 15.0, 20.0]
+    )
+
+
+chunks = [
+    {
+        "id": array(["a", "b"]),
+        "ra": array([pi / 2, pi]),
+        "dec": array([-pi / 4, 0.0]),
+        "r": array([12.0, nan], dtype=float32),
+        "err_r": array([0.01, nan], dtype=float32),
+    },
+    {
+        "id": array(["c"]),
+        "ra": array([pi / 3]),
+        "dec": array([pi / 6]),
+        "r": array([21.0], dtype=float32),
+        "err_r": array([0.2], dtype=float32),
+    },
+]
+
+
+# -------------------------------- TESTS --------------------------------
+
+
+def test_column_statistics(statistics):
+    for chunk in chunks:
+        statistics.update(chunk)
+    result = statistics.to_dict()
+
+    assert result["rows"] == 3
+    assert result["columns"]["id"]["count"] == 3
+    assert result["columns"]["r"]["count"] == 2
+    assert result["columns"]["r"]["nan_fraction"] == pytest.approx(1 / 3)
+    assert result["bounds"]["ra"] == pytest.approx([60.0, 180.0])
+    assert result["bounds"]["dec"] == pytest.approx([-45.0, 30.0])
+    assert result["histograms"]["r"]["counts"] == [1, 0]
+    assert result["histograms"]["r"]["overflow"] == 1
+    assert "err_r" not in result["histograms"]
+
+
+def test_column_statistics_without_rows(statistics):
+    result = statistics.to_dict()
+
+    assert result["columns"]["r"] == {"count": 0, "nan_fraction": 0.0, "min": None, "max": None}
+
+
+def test_column_statistics_write_json(statistics, tmp_path):
+    filename = tmp_path / "stats.json"
+    statistics.update(chunks[1])
+    statistics.write_json(str(filename), input="catalog.fits")
+    result = json.loads(filename.read_text())
+
+    assert result["input"] == "catalog.fits"
+    assert result["columns"]["err_r"]["max"] == pytest.approx(0.2)
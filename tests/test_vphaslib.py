@@ -1,33 +1,60 @@
+import json
+import os
 from io import StringIO
+from threading import Thread
 from unittest.mock import Mock, patch
 
+import numpy
 import pytest
+from astropy.io.fits import HDUList, ImageHDU
+from astropy.io.fits import PrimaryHDU as FITSPrimaryHDU
 
+from vphasfits import vphaslib
 from vphasfits.vphaslib import (
+    FitsCache,
+    catalog_keys,
+    compute_magnitude_columns,
     convert_catalog_fits_to_txt,
     convert_dec_to_ddmmss,
     convert_ra_to_hhmmss,
     convert_src_table_fits_to_txt,
     create_single_fits,
+    disable_fits_cache,
+    enable_fits_cache,
+    exit_on_broken_pipe,
     generate_catalog_format,
     generate_source_table_format,
     generate_txt_header,
+    get_calibration,
     get_catalog_fits_records,
+    get_pawprint_wcs,
     get_source_table_fits_records,
+    make_catalog_config,
+    make_image_config,
+    make_magnitude_columns,
     make_output_fits_filename,
+    make_output_npy_filename,
+    make_sky_columns,
+    make_src_table_config,
     make_txt_catalog_filename,
     make_txt_src_table_filename,
+    open_fits,
+    output_buffer_size,
     pawprint_from_mef,
+    pawprint_to_npy,
 )
 
 from .fits_stubs import (
     FITSRecordCatalog,
     FITSRecordTable,
+    FITSRecStub,
     HDUListCatalog,
     HDUListImgStub,
     HDUListTable,
     Header,
     ImageHDUStub,
+    src_table_header,
+    write_catalog_fits,
 )
 
 
@@ -84,6 +111,38 @@ def make_txt_catalog_filename_mock():
         yield mock
 
 
+@pytest.fixture
+def sys_mock():
+    with patch("vphasfits.vphaslib.sys") as mock:
+        mock.stdout.fileno.return_value = 1
+        mock.stdin.buffer.read.return_value = b"SIMPLE"
+        yield mock
+
+
+@pytest.fixture
+def fits_files(tmp_path):
+    filenames = []
+    for number in range(3):
+        filename = str(tmp_path / f"image{number}.fits")
+        primary = FITSPrimaryHDU()
+        primary.header["OBJECT"] = "M13"
+        HDUList([primary, ImageHDU([[number]])]).writeto(filename)
+        filenames.append(filename)
+
+    yield filenames
+
+
+@pytest.fixture
+def catalog_fits(tmp_path):
+    yield write_catalog_fits(tmp_path / "catalog.fits", range(25))
+
+
+@pytest.fixture
+def cache():
+    yield enable_fits_cache(2)
+    disable_fits_cache()
+
+
 # -------------------------------- TESTS --------------------------------
 
 
@@ -355,3 +414,357 @@ def test_convert_catalog_fits_to_txt_passing_output(fits_catalog_open_mock, open
     convert_catalog_fits_to_txt(fits, "output_catalog.txt")
 
     make_txt_catalog_filename_mock.assert_not_called()
+
+
+def test_make_catalog_config_is_not_affected_by_global_keys():
+    config = make_catalog_config()
+    catalog_keys.append("PSF_FWHM")
+
+    try:
+        assert "PSF_FWHM" not in config.keys
+        assert config.header == generate_txt_header(catalog_keys[:-1])
+        assert config.row_format == generate_catalog_format(catalog_keys[:-1])
+    finally:
+        catalog_keys.remove("PSF_FWHM")
+
+
+def test_get_pawprint_from_mef_passing_config(create_single_fits_mock):
+    pawprint_from_mef("mef.fits", 7, config=make_image_config(["CRPIX1"]))
+
+    create_single_fits_mock.assert_called_once_with("mef.fits", 7, ("CRPIX1",))
+
+
+def test_convert_src_table_fits_to_txt_passing_config(fits_src_table_open_mock, open_mock):
+    result = "# Sequence_number DEC\n         1.0 -01:19:04.09\n         1.0 -01:19:04.09\n"
+    convert_src_table_fits_to_txt("file.fits", 1, config=make_src_table_config(["Sequence_number", "DEC"]))
+    content = open_mock.return_value.__enter__.return_value
+    content.seek(0)
+    assert "".join(content.readlines()) == result
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 1000])
+def test_convert_catalog_fits_to_txt_passing_config(fits_catalog_open_mock, open_mock, chunk_size):
+    result = (
+        "# sourceID u g\n"
+        "  0222b-4-68296            -1.0          22.754\n"
+        "  0222b-4-68296            -1.0          22.754\n"
+    )
+    config = make_catalog_config(["sourceID", "u", "g"], nan_value=-1.0, chunk_size=chunk_size)
+    convert_catalog_fits_to_txt("file.fits", config=config)
+    content = open_mock.return_value.__enter__.return_value
+    content.seek(0)
+    assert "".join(content.readlines()) == result
+
+
+def test_fits_cache_counts_hits_and_misses(fits_files, cache):
+    for filename in [fits_files[0], fits_files[0], fits_files[1], fits_files[0]]:
+        with open_fits(filename) as hdu_descriptor:
+            assert len(hdu_descriptor) == 2
+
+    assert cache.info() == {"hits": 2, "misses": 2, "maxsize": 2, "currsize": 2}
+
+
+def test_fits_cache_reopens_modified_file(fits_files, cache):
+    first = cache.get(fits_files[0])
+    stat = os.stat(fits_files[0])
+    os.utime(fits_files[0], ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    second = cache.get(fits_files[0])
+
+    assert first.hdu_list is not second.hdu_list
+    assert cache.info()["misses"] == 2
+
+
+def test_fits_cache_closes_least_recently_used_file(fits_files):
+    cache = FitsCache(2)
+    oldest = cache.get(fits_files[0])
+    cache.get(fits_files[1])
+    cache.get(fits_files[2])
+
+    assert oldest.hdu_list._file.closed
+    assert cache.info()["currsize"] == 2
+
+
+def test_fits_cache_closes_evicted_file_after_it_is_released(fits_files):
+    cache = FitsCache(1)
+    entry = cache.get(fits_files[0])
+
+    with entry.lock:
+        thread = Thread(target=cache.get, args=(fits_files[1],))
+        thread.start()
+        thread.join(0.1)
+        assert thread.is_alive()
+        assert not entry.hdu_list._file.closed
+
+    thread.join()
+    assert entry.hdu_list._file.closed
+
+
+def test_fits_cache_clear(fits_files):
+    cache = FitsCache()
+    entry = cache.get(fits_files[0])
+    cache.get(fits_files[0])
+    cache.clear()
+
+    assert entry.hdu_list._file.closed
+    assert cache.info() == {"hits": 0, "misses": 0, "maxsize": 8, "currsize": 0}
+
+
+def test_create_single_fits_does_not_modify_cached_header(fits_files, cache):
+    for _ in range(2):
+        single_fits = create_single_fits(fits_files[1], 1, [])
+
+    assert (single_fits.data == [[1]]).all()
+    assert single_fits.header["OBJECT"] == "M13-p1"
+    assert cache.get(fits_files[1]).hdu_list[0].header["OBJECT"] == "M13"
+
+
+def test_convert_catalog_fits_to_txt_to_stdout(fits_catalog_open_mock, open_mock, sys_mock):
+    convert_catalog_fits_to_txt("file.fits", "-")
+
+    sys_mock.stdout.flush.assert_called_once()
+    open_mock.assert_called_once_with(1, "w", buffering=output_buffer_size, closefd=False)
+
+
+def test_exit_on_broken_pipe(sys_mock):
+    with patch("vphasfits.vphaslib.os") as os_mock:
+        with exit_on_broken_pipe():
+            raise BrokenPipeError
+
+    os_mock.dup2.assert_called_once_with(os_mock.open.return_value, 1)
+    sys_mock.exit.assert_called_once_with(1)
+
+
+def test_convert_src_table_fits_to_txt_from_stdin_to_stdout(
+    fits_src_table_open_mock, open_mock, sys_mock, make_txt_src_table_filename_mock
+):
+    convert_src_table_fits_to_txt("-", 3)
+
+    assert fits_src_table_open_mock.call_args[0][0].read() == b"SIMPLE"
+    make_txt_src_table_filename_mock.assert_not_called()
+    open_mock.assert_called_once_with(1, "w", buffering=output_buffer_size, closefd=False)
+
+
+def test_convert_src_table_fits_to_txt_from_stdin_with_derived_columns(
+    fits_src_table_open_mock, open_mock, sys_mock, make_txt_src_table_filename_mock
+):
+    convert_src_table_fits_to_txt("-", 3, config=make_src_table_config(derived=[make_sky_columns()]))
+
+    fits_src_table_open_mock.assert_called_once()
+    sys_mock.stdin.buffer.read.assert_called_once_with()
+
+
+def test_convert_catalog_fits_to_txt_statistics(fits_catalog_open_mock, open_mock, tmp_path):
+    statistics_json = tmp_path / "stats.json"
+    convert_catalog_fits_to_txt("file.fits", "catalog.txt", statistics_json=str(statistics_json))
+    result = json.loads(statistics_json.read_text())
+
+    assert result["input"] == "file.fits"
+    assert result["rows"] == 2
+    assert result["columns"]["u"] == {"count": 0, "nan_fraction": 1.0, "min": None, "max": None}
+    assert result["bounds"]["dec"] == pytest.approx([-30.812, -30.812])
+    assert sorted(result["histograms"]) == ["g", "ha", "i", "r", "r2", "u"]
+
+
+def test_convert_src_table_fits_to_txt_statistics(fits_src_table_open_mock, open_mock, tmp_path):
+    statistics_json = tmp_path / "stats.json"
+    convert_src_table_fits_to_txt("file.fits", 5, "table.txt", statistics_json=str(statistics_json))
+    result = json.loads(statistics_json.read_text())
+
+    assert result["pawprint"] == 5
+    assert result["bounds"]["ra"] == pytest.approx([242.647625, 242.647625])
+    assert result["histograms"] == {}
+
+
+def test_convert_catalog_fits_to_txt_resumes_from_checkpoint(catalog_fits, tmp_path):
+    config = make_catalog_config(["sourceID", "RAJ2000", "DEJ2000", "r", "err_r"], chunk_size=4)
+    expected_txt, expected_json = tmp_path / "expected.dat", tmp_path / "expected.json"
+    catalog_txt, statistics_json = tmp_path / "catalog.dat", tmp_path / "catalog.json"
+    checkpoint = tmp_path / "catalog.ckpt"
+    convert_catalog_fits_to_txt(catalog_fits, str(expected_txt), config, str(expected_json))
+    format_chunk = vphaslib.format_chunk
+    chunks = []
+
+    def interrupted_format_chunk(*args):
+        chunks.append(args[0])
+        if len(chunks) == 4:
+            with open(catalog_txt, "a") as file_descriptor:
+                file_descriptor.write("   partially written row")
+            raise KeyboardInterrupt
+        return format_chunk(*args)
+
+    with patch("vphasfits.vphaslib.format_chunk", interrupted_format_chunk):
+        with pytest.raises(KeyboardInterrupt):
+            convert_catalog_fits_to_txt(catalog_fits, str(catalog_txt), config, str(statistics_json), str(checkpoint))
+
+    assert json.loads(checkpoint.read_text())["row"] == 12
+
+    convert_catalog_fits_to_txt(catalog_fits, str(catalog_txt), config, str(statistics_json), str(checkpoint))
+
+    assert catalog_txt.read_text() == expected_txt.read_text()
+    assert json.loads(statistics_json.read_text())["columns"] == json.loads(expected_json.read_text())["columns"]
+    assert not checkpoint.exists()
+
+
+def test_convert_catalog_fits_to_txt_ignores_checkpoint_of_other_conversion(catalog_fits, tmp_path):
+    catalog_txt, checkpoint = tmp_path / "catalog.dat", tmp_path / "catalog.ckpt"
+    catalog_txt.write_text("# sourceID\n")
+    signature = vphaslib.make_checkpoint_signature(catalog_fits, make_catalog_config(["sourceID"]))
+    vphaslib.write_checkpoint(str(checkpoint), {"signature": signature, "row": 25, "offset": 11, "statistics": None})
+    config = make_catalog_config(["sourceID", "r"])
+    convert_catalog_fits_to_txt(catalog_fits, str(catalog_txt), config, checkpoint=str(checkpoint))
+
+    assert len(catalog_txt.read_text().splitlines()) == 26
+
+
+def test_convert_catalog_fits_to_txt_restarts_checkpoint_without_statistics(catalog_fits, tmp_path):
+    config = make_catalog_config(["sourceID", "r"])
+    expected_json, statistics_json = tmp_path / "expected.json", tmp_path / "catalog.json"
+    catalog_txt, checkpoint = tmp_path / "catalog.dat", tmp_path / "catalog.ckpt"
+    convert_catalog_fits_to_txt(catalog_fits, str(tmp_path / "expected.dat"), config, str(expected_json))
+    catalog_txt.write_text(config.header + "   0222b-4-0   15.0\n")
+    signature = vphaslib.make_checkpoint_signature(catalog_fits, config)
+    state = {"signature": signature, "row": 1, "offset": len(catalog_txt.read_text()), "statistics": None}
+    vphaslib.write_checkpoint(str(checkpoint), state)
+    convert_catalog_fits_to_txt(catalog_fits, str(catalog_txt), config, str(statistics_json), str(checkpoint))
+
+    assert json.loads(statistics_json.read_text())["columns"] == json.loads(expected_json.read_text())["columns"]
+
+
+def test_convert_catalog_fits_to_txt_checkpoint_requires_files(fits_catalog_open_mock):
+    with pytest.raises(ValueError):
+        convert_catalog_fits_to_txt("file.fits", "-", checkpoint="catalog.ckpt")
+
+
+def test_get_pawprint_wcs(tmp_path):
+    filename = str(tmp_path / "image.fits")
+    image = ImageHDU([[1]])
+    image.header.update({"CRVAL1": 275.0, "CRVAL2": -30.0, "CRPIX1": 1.0, "CRPIX2": 2.0})
+    image.header.update({"CD1_1": 1e-4, "CD1_2": 0.0, "CD2_1": 0.0, "CD2_2": 1e-4, "PV2_1": 1.0})
+    HDUList([FITSPrimaryHDU(), image]).writeto(filename)
+
+    assert get_pawprint_wcs(filename, 1) == {
+        "CRVAL1": 275.0,
+        "CRVAL2": -30.0,
+        "CRPIX1": 1.0,
+        "CRPIX2": 2.0,
+        "CD1_1": 1e-4,
+        "CD1_2": 0.0,
+        "CD2_1": 0.0,
+        "CD2_2": 1e-4,
+    }
+
+
+@pytest.mark.parametrize(
+    "wcs, result",
+    [
+        (None, "# Sequence_number RA_TAN DEC_TAN\n         1.0  242.5998213   -1.2998325\n"),
+        ({"CRVAL1": 10.0, "CRVAL2": 20.0, "CRPIX1": 43.135, "CRPIX2": 12.938, "CD1_1": 1.0, "CD1_2": 0.0,
+          "CD2_1": 0.0, "CD2_2": 1.0}, "# Sequence_number RA_TAN DEC_TAN\n         1.0         10.0         20.0\n"),
+    ],
+)
+def test_convert_src_table_fits_to_txt_with_sky_columns(fits_src_table_open_mock, open_mock, wcs, result):
+    config = make_src_table_config(["Sequence_number"], derived=[make_sky_columns(wcs)])
+    convert_src_table_fits_to_txt("file.fits", 1, config=config)
+    content = open_mock.return_value.__enter__.return_value
+    content.seek(0)
+    assert content.readlines()[:2] == result.splitlines(keepends=True)
+
+
+@pytest.mark.parametrize(
+    "fits, pawprint, result",
+    [
+        ("0800b.fits", 7, "0800b-p7.npy"),
+        ("data/0800b", 12, "data/0800b-p12.npy"),
+    ],
+)
+def test_make_output_npy_filename(fits, pawprint, result):
+    assert make_output_npy_filename(fits, pawprint) == result
+
+
+@pytest.mark.parametrize("block_rows", [1, 2, 256])
+def test_pawprint_to_npy(tmp_path, block_rows):
+    filename, output = str(tmp_path / "0800b.fits"), tmp_path / "0800b-p1.npy"
+    data = numpy.arange(15, dtype=">f4").reshape(5, 3) + 100.0
+    image = ImageHDU(data.copy())
+    image.scale("int16", bscale=0.5, bzero=100.0)
+    image.header.update({"CRVAL1": 275.0, "CRVAL2": -30.0})
+    HDUList([FITSPrimaryHDU(), image]).writeto(filename)
+
+    pawprint_to_npy(filename, 1, config=make_image_config(["CRVAL1", "CRVAL2"]), block_rows=block_rows)
+    pixels = numpy.load(output, mmap_mode="r")
+    sidecar = json.loads((tmp_path / "0800b-p1.json").read_text())
+
+    assert pixels.dtype == numpy.dtype("float32") and pixels.dtype.isnative
+    numpy.testing.assert_allclose(pixels, data)
+    assert sidecar == {"input": filename, "pawprint": 1, "shape": [5, 3], "header": {"CRVAL1": 275.0, "CRVAL2": -30.0}}
+
+
+@pytest.mark.parametrize(
+    "columns, result",
+    [
+        (
+            [make_magnitude_columns()],
+            "# Sequence_number Aper_mag_3 Aper_mag_3_err\n         1.0      25.2282       0.0279\n",
+        ),
+        (
+            [make_magnitude_columns("Peak_height", "Peak_height_err", ["mag", "err"], zero_point=26.0, airmass=1.0)],
+            "# Sequence_number mag err\n         1.0      24.4503        0.004\n",
+        ),
+    ],
+)
+def test_convert_src_table_fits_to_txt_with_magnitude_columns(fits_src_table_open_mock, open_mock, columns, result):
+    config = make_src_table_config(["Sequence_number"], derived=columns)
+    convert_src_table_fits_to_txt("file.fits", 1, config=config)
+    content = open_mock.return_value.__enter__.return_value
+    content.seek(0)
+    assert content.readlines()[:2] == result.splitlines(keepends=True)
+
+
+def test_compute_magnitude_columns_of_non_positive_fluxes():
+    calibration = {"zero_point": 25.0, "extinction": 0.0, "exposure_time": 1.0, "airmass": 1.0}
+    for flux in [0.0, -3.5]:
+        columns = compute_magnitude_columns(
+            FITSRecStub({"flux": flux, "err": 1.0}), {}, "flux", "err", ("mag", "mag_err"), calibration
+        )
+        assert numpy.isnan(columns["mag"]).all() and numpy.isnan(columns["mag_err"]).all()
+
+
+def test_get_calibration():
+    header = {"MAGZPT": 25.0, "EXTINCT": 0.1, "EXPTIME": 20.0, "ESO TEL AIRM START": 1.1, "ESO TEL AIRM END": 1.3}
+    explicit = {"zero_point": 24.0, "extinction": None, "exposure_time": None, "airmass": None}
+
+    assert get_calibration(header, explicit) == pytest.approx(
+        {"zero_point": 24.0, "extinction": 0.1, "exposure_time": 20.0, "airmass": 1.2}
+    )
+
+    with pytest.raises(KeyError, match="MAGZPT"):
+        get_calibration({}, dict.fromkeys(explicit))
+
+    with pytest.raises(KeyError, match="AIRMASS"):
+        get_calibration({"ESO TEL AIRM START": 1.1}, dict(explicit, extinction=0.1, exposure_time=20.0))
+
+
+def test_convert_src_table_fits_to_txt_with_missing_calibration_keys(fits_src_table_open_mock, open_mock):
+    config = make_src_table_config(["Sequence_number"], derived=[make_magnitude_columns()])
+
+    with patch.dict(src_table_header):
+        del src_table_header["MAGZPT"]
+        with pytest.raises(KeyError, match="MAGZPT"):
+            convert_src_table_fits_to_txt("file.fits", 1, config=config)
+
+    open_mock.assert_not_called()
+
+
+def test_compute_magnitude_columns_after_resolving_calibration():
+    header = {"MAGZPT": 25.0, "EXTINCT": 0.1, "EXPTIME": 1.0, "AIRMASS": 1.0}
+    columns = make_magnitude_columns("flux", None, ["mag"]).prepare(header)
+
+    assert columns.compute(FITSRecStub({"flux": 100.0}), {})["mag"] == pytest.approx([20.0, 20.0])
+
+
+def test_make_src_table_config_with_magnitude_columns():
+    derived = [make_magnitude_columns(), make_magnitude_columns("Peak_height", None)]
+    config = make_src_table_config(["RA"], derived=derived)
+
+    assert config.keys == ("RA", "Aper_mag_3", "Aper_mag_3_err", "Peak_height_mag")
+    assert config.magnitude_keys == ("Aper_mag_3", "Peak_height_mag")
@@ -1,17 +1,52 @@
+from vphasfits.arrays import iter_catalog_chunks, iter_source_table_chunks, read_catalog, read_source_table
+from vphasfits.preview import mosaic_preview_from_mef
+from vphasfits.reader import (
+    iter_catalog_txt_chunks,
+    iter_src_table_txt_chunks,
+    read_catalog_txt,
+    read_src_table_txt,
+)
 from vphasfits.vphaslib import (
+    ConversionConfig,
     catalog_keys,
     convert_catalog_fits_to_txt,
     convert_src_table_fits_to_txt,
+    disable_fits_cache,
+    enable_fits_cache,
     image_header_keys,
+    make_catalog_config,
+    make_image_config,
+    make_magnitude_columns,
+    make_sky_columns,
+    make_src_table_config,
     pawprint_from_mef,
+    pawprint_to_npy,
     source_table_keys,
 )
 
 __all__ = [
+    "ConversionConfig",
     "catalog_keys",
     "convert_catalog_fits_to_txt",
     "convert_src_table_fits_to_txt",
+    "disable_fits_cache",
+    "enable_fits_cache",
     "image_header_keys",
+    "iter_catalog_chunks",
+    "iter_catalog_txt_chunks",
+    "iter_source_table_chunks",
+    "iter_src_table_txt_chunks",
+    "make_catalog_config",
+    "make_image_config",
+    "make_magnitude_columns",
+    "make_sky_columns",
+    "make_src_table_config",
+    "mosaic_preview_from_mef",
     "pawprint_from_mef",
+    "pawprint_to_npy",
+    "read_catalog",
+    "read_catalog_txt",
+    "read_source_table",
+    "read_src_table_txt",
     "source_table_keys",
 ]
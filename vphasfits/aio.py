@@ -0,0 +1,158 @@
+"""
+Asyncio interface of the vphasfits package.
+
+Provides one class:
+  - AsyncConverter with coroutines running conversions on an executor
+
+Blocking conversions run on a thread or process executor, so awaiting
+them doesn't stall the event loop. A semaphore limits the number of
+conversions running at the same time; the rest wait in the event loop.
+Each event loop gets its own semaphore, so a converter can be reused by
+next asyncio.run calls.
+A cancelled coroutine stops its conversion between chunks of records
+(or before it starts) and releases the semaphore when the worker is
+done.
+
+"""
+import asyncio
+import multiprocessing
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Any, Callable, Dict, Optional, Sequence
+from weakref import WeakKeyDictionary
+
+from vphasfits.vphaslib import (
+    ConversionCancelled,
+    ConversionConfig,
+    convert_catalog_fits_to_txt,
+    convert_src_table_fits_to_txt,
+    pawprint_from_mef,
+)
+
+default_max_concurrency = 4
+
+
+def call_unless_cancelled(function: Callable, cancel_event: Any, args: Sequence, kwargs: Dict[str, Any]) -> Any:
+    """Call a function in a worker unless the conversion has been cancelled while it was queued."""
+    if cancel_event.is_set():
+        raise ConversionCancelled("Conversion cancelled before it started")
+
+    return function(*args, **kwargs)
+
+
+class AsyncConverter:
+    """
+    Run conversions of FITS files as coroutines.
+
+    Parameters
+    ----------
+    executor : concurrent.futures.Executor, optional
+        Executor of the conversions. The default is None.
+        If None the default executor of the event loop is used.
+        Conversions on a ProcessPoolExecutor get picklable
+        cancel events from a multiprocessing manager.
+    max_concurrency : int, optional
+        Number of conversions running at the same time.
+        The default is 4.
+
+    Examples
+    --------
+    >>> import asyncio
+    >>> from vphasfits.aio import AsyncConverter
+    >>> async def main(filenames):
+    ...     async with AsyncConverter(max_concurrency=8) as converter:
+    ...         await asyncio.gather(*[converter.convert_catalog_fits_to_txt(name) for name in filenames])
+    >>> asyncio.run(main(["VPHASDR2_PSC_L213_B-1.fits", "VPHASDR2_PSC_L214_B-1.fits"]))
+    """
+
+    def __init__(self, executor: Optional[Executor] = None, max_concurrency: int = default_max_concurrency):
+        self.executor = executor
+        self.max_concurrency = max_concurrency
+        self.semaphores: "WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = WeakKeyDictionary()
+        self.manager: Optional[Any] = None
+
+    async def __aenter__(self) -> "AsyncConverter":
+        return self
+
+    async def __aexit__(self, *_: Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Stop the multiprocessing manager of cancel events if it has been started."""
+        if self.manager is not None:
+            self.manager.shutdown()
+            self.manager = None
+
+    def make_cancel_event(self) -> Any:
+        """Prepare an event shared with a worker of the executor."""
+        if isinstance(self.executor, ProcessPoolExecutor):
+            if self.manager is None:
+                self.manager = multiprocessing.Manager()
+            return self.manager.Event()
+
+        return threading.Event()
+
+    async def run(
+        self,
+        function: Callable,
+        args: Sequence = (),
+        kwargs: Optional[Dict[str, Any]] = None,
+        cancellable: bool = False,
+    ) -> Any:
+        """
+        Run a blocking function on the executor when the semaphore allows it.
+        A cancellable function gets the cancel_event keyword argument checked between chunks.
+        """
+        loop = asyncio.get_running_loop()
+        if loop not in self.semaphores:
+            self.semaphores[loop] = asyncio.Semaphore(self.max_concurrency)
+
+        async with self.semaphores[loop]:
+            cancel_event = self.make_cancel_event()
+            kwargs = dict(kwargs or {}, cancel_event=cancel_event) if cancellable else dict(kwargs or {})
+            future = loop.run_in_executor(self.executor, call_unless_cancelled, function, cancel_event, args, kwargs)
+
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                cancel_event.set()
+                await asyncio.gather(future, return_exceptions=True)
+                raise
+
+    async def pawprint_from_mef(
+        self,
+        multi_extension_fits_filename: str,
+        pawprint_number: int,
+        output_fits_filename: Optional[str] = None,
+        config: Optional[ConversionConfig] = None,
+    ) -> None:
+        """Coroutine of pawprint_from_mef. The conversion can be cancelled only before it starts."""
+        args = (multi_extension_fits_filename, pawprint_number, output_fits_filename, config)
+        await self.run(pawprint_from_mef, args)
+
+    async def convert_src_table_fits_to_txt(
+        self,
+        src_table_fits: str,
+        pawprint_number: int,
+        src_table_txt: Optional[str] = None,
+        config: Optional[ConversionConfig] = None,
+        statistics_json: Optional[str] = None,
+    ) -> None:
+        """Coroutine of convert_src_table_fits_to_txt. The conversion can be cancelled between chunks."""
+        args = (src_table_fits, pawprint_number, src_table_txt, config, statistics_json)
+        await self.run(convert_src_table_fits_to_txt, args, cancellable=True)
+
+    async def convert_catalog_fits_to_txt(
+        self,
+        catalog_fits: str,
+        catalog_txt: Optional[str] = None,
+        config: Optional[ConversionConfig] = None,
+        statistics_json: Optional[str] = None,
+        checkpoint: Optional[str] = None,
+    ) -> None:
+        """
+        Coroutine of convert_catalog_fits_to_txt. The conversion can be cancelled between chunks;
+        with a checkpoint a cancelled conversion continues from the last written chunk next time.
+        """
+        args = (catalog_fits, catalog_txt, config, statistics_json, checkpoint)
+        await self.run(convert_catalog_fits_to_txt, args, cancellable=True)
@@ -0,0 +1,221 @@
+"""
+In-memory readers of FITS tables from the VPHAS+ survey.
+
+Provides four functions:
+  - Read a catalog to a structured array (or a dictionary of arrays)
+  - Read a source table of a single pawprint
+  - Iterate over chunks of rows of a catalog
+  - Iterate over chunks of rows of a source table
+
+Columns are chosen and NaN values are handled in the same way as
+by the converters to text files, but nothing is written to disk.
+Values are copied from the FITS file to native-endian arrays, which
+don't depend on the file after they are read. RA/DEC are given in
+degrees.
+
+"""
+from typing import Any, Dict, Iterator, Optional, Sequence, Union
+
+from astropy.io.fits.fitsrec import FITS_rec
+from numpy import asarray, degrees, empty, float32, isnan, ndarray
+
+from vphasfits.vphaslib import (
+    ConversionConfig,
+    catalog_nan_value,
+    default_chunk_size,
+    get_catalog_fits_records,
+    get_chunk_columns,
+    get_source_table_fits_records_and_header,
+    iter_record_chunks,
+    make_catalog_config,
+    make_src_table_config,
+    prepare_derived_columns,
+)
+
+Columns = Union[ndarray, Dict[str, ndarray]]
+
+
+def convert_column(key: str, values: Sequence, config: ConversionConfig) -> ndarray:
+    """Copy values of a column to a native-endian array. Coordinates are converted to degrees."""
+    values = asarray(values)
+    values = values.astype(values.dtype.newbyteorder("="))
+
+    if key in config.coordinate_keys and config.coordinate_unit == "radian":
+        values = degrees(values)
+
+    if config.nan_value is not None and values.dtype == float32:
+        values[isnan(values)] = config.nan_value
+
+    return values
+
+
+def records_to_columns(
+    records: FITS_rec, config: ConversionConfig, as_dict: bool = False, header: Optional[Dict[str, Any]] = None
+) -> Columns:
+    """Copy columns of a config from records to a structured array or a dictionary of arrays."""
+    values = get_chunk_columns(records, config, header)
+    columns = {key: convert_column(key, values[key], config) for key in config.keys}
+
+    if as_dict:
+        return columns
+
+    array = empty(len(records), dtype=[(key, column.dtype, column.shape[1:]) for key, column in columns.items()])
+    for key, column in columns.items():
+        array[key] = column
+
+    return array
+
+
+def read_catalog(
+    catalog_fits: str,
+    columns: Optional[Sequence[str]] = None,
+    nan_value: Optional[float] = catalog_nan_value,
+    as_dict: bool = False,
+    config: Optional[ConversionConfig] = None,
+) -> Columns:
+    """
+    Read a catalog from FITS file to memory.
+
+    Parameters
+    ----------
+    catalog_fits : str
+        Name (or path) of the FITS file with a catalog.
+    columns : list of str, optional
+        Columns to read. The default is None.
+        If None the catalog_keys are used.
+    nan_value : float, optional
+        A value replacing NaN values of magnitudes and
+        their errors. The default is 99.9999. If None
+        NaN values are kept.
+    as_dict : bool, optional
+        Return a dictionary of arrays instead of a structured
+        array. The default is False.
+    config : ConversionConfig, optional
+        Config made by make_catalog_config. The default is None.
+        If given, columns and nan_value are ignored.
+
+    Returns
+    -------
+    numpy.ndarray or dict
+        Structured array (or a dictionary of arrays)
+        with the columns in the native byte order.
+
+    Examples
+    --------
+    >>> from vphasfits import read_catalog
+    >>> catalog = read_catalog("VPHASDR2_PSC_L213_B-1.fits", ["sourceID", "RAJ2000", "DEJ2000", "r"], nan_value=None)
+    >>> catalog["r"][:2]
+    array([20.047,    nan], dtype=float32)
+    """
+    if config is None:
+        config = make_catalog_config(columns, nan_value)
+
+    return records_to_columns(get_catalog_fits_records(catalog_fits), config, as_dict)
+
+
+def read_source_table(
+    src_table_fits: str,
+    pawprint_number: int,
+    columns: Optional[Sequence[str]] = None,
+    nan_value: Optional[float] = None,
+    as_dict: bool = False,
+    config: Optional[ConversionConfig] = None,
+) -> Columns:
+    """
+    Read a source table of a single pawprint from FITS file to memory.
+
+    Parameters
+    ----------
+    src_table_fits : str
+        Name (or path) of the FITS file with source tables.
+    pawprint_number : int
+        Number of the pawprint.
+    columns : list of str, optional
+        Columns to read. The default is None.
+        If None the source_table_keys are used.
+    nan_value : float, optional
+        A value replacing NaN values. The default is None.
+        If None NaN values are kept.
+    as_dict : bool, optional
+        Return a dictionary of arrays instead of a structured
+        array. The default is False.
+    config : ConversionConfig, optional
+        Config made by make_src_table_config, e.g. with derived
+        columns. The default is None. If given, columns and
+        nan_value are ignored.
+
+    Returns
+    -------
+    numpy.ndarray or dict
+        Structured array (or a dictionary of arrays) with
+        the columns in the native byte order. RA and DEC
+        are converted from radians to degrees.
+
+    Examples
+    --------
+    >>> from vphasfits import read_source_table
+    >>> table = read_source_table("0704a.fits", 23, ["RA", "DEC", "Aper_flux_3"], as_dict=True)
+    >>> table["RA"][:2]
+    array([242.6591, 242.6602])
+    """
+    if config is None:
+        config = make_src_table_config(columns, nan_value)
+
+    records, header = get_source_table_fits_records_and_header(src_table_fits, pawprint_number, bool(config.derived))
+    config = prepare_derived_columns(config, header)
+
+    return records_to_columns(records, config, as_dict, header)
+
+
+def iter_catalog_chunks(
+    catalog_fits: str,
+    columns: Optional[Sequence[str]] = None,
+    nan_value: Optional[float] = catalog_nan_value,
+    chunk_size: int = default_chunk_size,
+    as_dict: bool = False,
+    config: Optional[ConversionConfig] = None,
+) -> Iterator[Columns]:
+    """
+    Iterate over chunks of a catalog from FITS file.
+
+    Each chunk has at most chunk_size rows (or config.chunk_size
+    rows if a config is given). See read_catalog for the
+    description of other parameters.
+
+    Examples
+    --------
+    >>> from vphasfits import iter_catalog_chunks
+    >>> chunks = iter_catalog_chunks("VPHASDR2_PSC_L213_B-1.fits", ["r"], nan_value=None, chunk_size=100000)
+    >>> bright = sum((chunk["r"] < 16.0).sum() for chunk in chunks)
+    """
+    if config is None:
+        config = make_catalog_config(columns, nan_value, chunk_size)
+
+    for _, chunk in iter_record_chunks(get_catalog_fits_records(catalog_fits), config.chunk_size):
+        yield records_to_columns(chunk, config, as_dict)
+
+
+def iter_source_table_chunks(
+    src_table_fits: str,
+    pawprint_number: int,
+    columns: Optional[Sequence[str]] = None,
+    nan_value: Optional[float] = None,
+    chunk_size: int = default_chunk_size,
+    as_dict: bool = False,
+    config: Optional[ConversionConfig] = None,
+) -> Iterator[Columns]:
+    """
+    Iterate over chunks of a source table of a single pawprint from FITS file.
+
+    Each chunk has at most chunk_size rows (or config.chunk_size
+    rows if a config is given). See read_source_table for the
+    description of other parameters.
+    """
+    if config is None:
+        config = make_src_table_config(columns, nan_value, chunk_size)
+
+    records, header = get_source_table_fits_records_and_header(src_table_fits, pawprint_number, bool(config.derived))
+    config = prepare_derived_columns(config, header)
+
+    for _, chunk in iter_record_chunks(records, config.chunk_size):
+        yield records_to_columns(chunk, config, as_dict, header)
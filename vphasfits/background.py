@@ -0,0 +1,298 @@
+"""
+Background and noise statistics of VPHAS+ pawprints.
+
+Provides four functions:
+  - Measure sky background, noise and saturated pixels of a pawprint
+  - Save the statistics of pawprints from a MEF image to a text file
+  - Record the statistics as keys of a FITS header
+  - Record the statistics as keys of pawprint headers of a MEF image
+
+Each extension is read in blocks of rows, so only one block is held in
+memory. Pixel values are counted in a histogram with fixed bins during
+a single pass. The background (median) and the noise (half of the range
+between 15.87 and 84.13 percentiles) are estimated from the histogram
+and refined by sigma clipping of its bins.
+
+"""
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from astropy.io import fits
+from numpy import (
+    arange,
+    asarray,
+    bincount,
+    clip,
+    concatenate,
+    cumsum,
+    flatnonzero,
+    float64,
+    full,
+    int64,
+    isfinite,
+    maximum,
+    nan,
+    ndarray,
+    searchsorted,
+    zeros,
+)
+
+from vphasfits.vphaslib import (
+    default_block_rows,
+    generate_source_table_format,
+    generate_txt_header,
+    open_fits,
+    open_txt_output,
+)
+
+background_keys = ["BKGMED", "BKGSIG", "BKGRMS", "NSATUR", "NGOOD", "NBAD"]
+background_comments = {
+    "BKGMED": "Median of sky background",
+    "BKGSIG": "Noise of sky background from percentiles",
+    "BKGRMS": "RMS of sigma-clipped pixels",
+    "NSATUR": "Number of saturated pixels",
+    "NGOOD": "Number of finite pixels",
+    "NBAD": "Number of NaN or infinite pixels",
+}
+default_value_range = (-1000.0, 70000.0)
+default_bin_width = 0.25
+default_saturation = 65535.0
+clip_sigma = 3.0
+clip_iterations = 10
+sigma_percentiles = (15.865525, 84.134475)
+
+
+class PixelHistogram:
+    """Histogram of pixel values with fixed bins. The first and the last bin count values out of the range."""
+
+    def __init__(self, value_range: Tuple[float, float] = default_value_range, bin_width: float = default_bin_width):
+        self.low, high = value_range
+        self.bin_width = bin_width
+        self.counts = zeros(int((high - self.low) / bin_width) + 2, dtype=int64)
+        self.lower_edges = self.low + bin_width * (arange(len(self.counts)) - 1.0)
+
+    def bin_index(self, value: Any) -> Any:
+        """Get indices of bins containing the values."""
+        return clip((value - self.low) // self.bin_width + 1, 0, len(self.counts) - 1).astype(int64)
+
+    def update(self, values: ndarray) -> None:
+        """Add finite values of a block to the histogram."""
+        self.counts += bincount(self.bin_index(values), minlength=len(self.counts))
+
+    def percentiles(self, percentiles: Sequence[float], first: int, stop: int) -> ndarray:
+        """
+        Interpolate percentiles of values counted by bins from first to stop.
+        Values counted by a single bin are taken as equal to its lower edge, so they have no spread.
+        """
+        occupied = flatnonzero(self.counts[first:stop])
+        if len(occupied) == 1:
+            return full(len(percentiles), self.lower_edges[first + occupied[0]])
+
+        cumulative = concatenate([[0.0], cumsum(self.counts[first:stop], dtype=float64)])
+        ranks = asarray(percentiles, dtype=float64) / 100.0 * cumulative[-1]
+        bins = clip(searchsorted(cumulative, ranks), 1, len(cumulative) - 1)
+        fractions = (ranks - cumulative[bins - 1]) / maximum(cumulative[bins] - cumulative[bins - 1], 1.0)
+
+        return self.lower_edges[first + bins - 1] + fractions * self.bin_width
+
+    def rms(self, first: int, stop: int) -> float:
+        """Compute the standard deviation of values counted by bins from first to stop."""
+        counts = self.counts[first:stop].astype(float64)
+        centers = self.lower_edges[first:stop] + self.bin_width / 2.0
+        mean = (counts * centers).sum() / counts.sum()
+
+        return float(((counts * (centers - mean) ** 2).sum() / counts.sum()) ** 0.5)
+
+    def clipped_statistics(self) -> Tuple[float, float, float]:
+        """Get the median, the noise estimated from percentiles and the RMS of values left after sigma clipping."""
+        first, stop = 0, len(self.counts)
+
+        if not self.counts.sum():
+            return nan, nan, nan
+
+        for _ in range(clip_iterations):
+            median, lower, upper = self.percentiles((50.0,) + sigma_percentiles, first, stop)
+            sigma = (upper - lower) / 2.0
+            lowest, highest = self.bin_index(median - clip_sigma * sigma), self.bin_index(median + clip_sigma * sigma)
+            clipped = int(lowest), int(highest) + 1
+
+            if clipped == (first, stop) or not self.counts[clipped[0] : clipped[1]].sum():
+                break
+
+            first, stop = clipped
+
+        median, lower, upper = self.percentiles((50.0,) + sigma_percentiles, first, stop)
+
+        return float(median), float((upper - lower) / 2.0), self.rms(first, stop)
+
+
+def make_txt_background_filename(multi_extension_fits_filename: str) -> str:
+    """Prepare default name for text file which stores background statistics."""
+    suffix = ".fits"
+    file = Path(multi_extension_fits_filename)
+
+    if file.suffix != suffix:
+        multi_extension_fits_filename = str(file.with_suffix(suffix))
+
+    return multi_extension_fits_filename.replace(".fits", "-bkg.dat")
+
+
+def get_background_statistics(
+    multi_extension_fits_filename: str,
+    pawprint_number: int,
+    block_rows: int = default_block_rows,
+    saturation: Optional[float] = None,
+    value_range: Tuple[float, float] = default_value_range,
+    bin_width: float = default_bin_width,
+) -> Dict[str, Any]:
+    """
+    Measure sky background, noise and saturated pixels of a pawprint from MEF file.
+
+    Parameters
+    ----------
+    multi_extension_fits_filename : str
+        Name (or path) of the file with multi-extension
+        fits images from the VPHAS+ project.
+    pawprint_number : int
+        A number indicating the specific pawprint.
+        Valid values are from 1 to 32.
+    block_rows : int, optional
+        Number of rows read at once. The default is 256.
+    saturation : float, optional
+        Level of saturated pixels. The default is None.
+        If None the SATURATE key of the extension is used
+        or 65535 if the key is missing.
+    value_range : tuple of float, optional
+        Range of the histogram of pixel values.
+        The default is (-1000, 70000).
+    bin_width : float, optional
+        Width of bins of the histogram, which limits
+        the precision of the results. The default is 0.25.
+
+    Returns
+    -------
+    dict
+        Values of BKGMED, BKGSIG, BKGRMS, NSATUR, NGOOD
+        and NBAD, which can be used as header keys.
+
+    Examples
+    --------
+    >>> from vphasfits.background import get_background_statistics
+    >>> get_background_statistics("0800b.fits", 7)
+    {'BKGMED': 412.18, 'BKGSIG': 11.93, 'BKGRMS': 12.07, 'NSATUR': 3140, 'NGOOD': 8388608, 'NBAD': 0}
+    """
+    histogram = PixelHistogram(value_range, bin_width)
+    saturated = bad = 0
+
+    with open_fits(multi_extension_fits_filename) as hdu_descriptor:
+        hdu = hdu_descriptor[pawprint_number]
+        if saturation is None:
+            saturation = hdu.header.get("SATURATE", default_saturation)
+
+        for first in range(0, hdu.header["NAXIS2"], block_rows):
+            block = hdu.section[first : first + block_rows, :]
+            values = block[isfinite(block)]
+            bad += block.size - values.size
+            saturated += int((values >= saturation).sum())
+            histogram.update(values)
+
+    median, sigma, rms = histogram.clipped_statistics()
+
+    return dict(zip(background_keys, [median, sigma, rms, saturated, int(histogram.counts.sum()), bad]))
+
+
+def add_background_keys(header: Any, statistics: Dict[str, Any]) -> None:
+    """Record background statistics as keys of a FITS header."""
+    for key in background_keys:
+        header[key] = (statistics[key], background_comments[key])
+
+
+def update_background_keys(
+    multi_extension_fits_filename: str, pawprint_numbers: Sequence[int], statistics: Sequence[Dict[str, Any]]
+) -> None:
+    """Record background statistics as keys of pawprint headers. The MEF file is updated in place."""
+    with fits.open(multi_extension_fits_filename, mode="update") as hdu_descriptor:
+        for pawprint_number, pawprint_statistics in zip(pawprint_numbers, statistics):
+            add_background_keys(hdu_descriptor[pawprint_number].header, pawprint_statistics)
+
+
+def format_background_row(pawprint_number: int, statistics: Dict[str, Any]) -> Tuple[str, ...]:
+    """Format background statistics of a pawprint as columns of a text file."""
+    values = [f"{statistics[key]:.3f}" for key in background_keys[:3]]
+    counts = [str(statistics[key]) for key in background_keys[3:]]
+
+    return (str(pawprint_number), *values, *counts)
+
+
+def background_statistics_from_mef(
+    multi_extension_fits_filename: str,
+    pawprint_numbers: Optional[Iterable[int]] = None,
+    output_txt_filename: Optional[str] = None,
+    block_rows: int = default_block_rows,
+    saturation: Optional[float] = None,
+    update_header: bool = False,
+) -> List[Dict[str, Any]]:
+    """
+    Save background statistics of pawprints from MEF file to a text file.
+
+    Parameters
+    ----------
+    multi_extension_fits_filename : str
+        Name (or path) of the file with multi-extension
+        fits images from the VPHAS+ project.
+    pawprint_numbers : iterable of int, optional
+        Numbers of pawprints. The default is None.
+        If None all pawprints of the file are used.
+    output_txt_filename : str, optional
+        Name (or path) of the output text file.
+        The default is None. If None the name of the
+        output file has the same name as input file
+        with "-bkg.dat" suffix. The "-" name writes
+        to standard output.
+    block_rows : int, optional
+        Number of rows read at once. The default is 256.
+    saturation : float, optional
+        Level of saturated pixels. The default is None.
+        See get_background_statistics for details.
+    update_header : bool, optional
+        Record the statistics as keys of pawprint headers
+        (see background_keys). The default is False.
+
+    Returns
+    -------
+    list of dict
+        Statistics of each pawprint.
+
+    Examples
+    --------
+    >>> from vphasfits.background import background_statistics_from_mef
+    >>> statistics = background_statistics_from_mef("0800b.fits")  # Output file: 0800b-bkg.dat
+    >>> statistics = background_statistics_from_mef("0800b.fits", [7], "-", update_header=True)
+    """
+    if output_txt_filename is None:
+        output_txt_filename = make_txt_background_filename(multi_extension_fits_filename)
+
+    if pawprint_numbers is None:
+        with open_fits(multi_extension_fits_filename) as hdu_descriptor:
+            pawprint_numbers = range(1, len(hdu_descriptor))
+
+    pawprint_numbers = list(pawprint_numbers)
+
+    keys = ["Pawprint"] + background_keys
+    row_format = generate_source_table_format(keys)
+    results = []
+
+    with open_txt_output(output_txt_filename) as file_descriptor:
+        file_descriptor.write(generate_txt_header(keys))
+
+        for pawprint_number in pawprint_numbers:
+            statistics = get_background_statistics(
+                multi_extension_fits_filename, pawprint_number, block_rows, saturation
+            )
+            file_descriptor.write(row_format % format_background_row(pawprint_number, statistics))
+            results.append(statistics)
+
+    if update_header:
+        update_background_keys(multi_extension_fits_filename, pawprint_numbers, results)
+
+    return results
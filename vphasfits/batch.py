@@ -0,0 +1,273 @@
+"""
+Batch conversion of files shared by many workers.
+
+Provides one function:
+  - Convert files claimed through lease files in a shared work directory
+
+Workers (processes or hosts sharing a file system) run the same batch.
+Each task is claimed by creating its lease file exclusively. The owner
+refreshes the lease while it works, leases not refreshed for a long time
+are taken over by other workers. Outputs are written to temporary files
+and renamed, then the task is marked as done. A task which fails is
+marked as failed with the error message and the worker moves on.
+
+"""
+import hashlib
+import json
+import os
+import socket
+from pathlib import Path
+from threading import Event, Thread
+from time import time
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+from uuid import uuid4
+
+from vphasfits.vphaslib import (
+    ConversionConfig,
+    convert_catalog_fits_to_txt,
+    convert_src_table_fits_to_txt,
+    make_output_fits_filename,
+    make_txt_catalog_filename,
+    make_txt_src_table_filename,
+    pawprint_from_mef,
+)
+
+default_lease_timeout = 600.0
+
+
+def convert_pawprint(input_filename: str, pawprint: int, output_filename: str, config: Optional[ConversionConfig]):
+    """Run pawprint_from_mef as a batch task."""
+    pawprint_from_mef(input_filename, pawprint, output_filename, config)
+
+
+def convert_src_table(input_filename: str, pawprint: int, output_filename: str, config: Optional[ConversionConfig]):
+    """Run convert_src_table_fits_to_txt as a batch task."""
+    convert_src_table_fits_to_txt(input_filename, pawprint, output_filename, config)
+
+
+def convert_catalog(input_filename: str, _: Optional[int], output_filename: str, config: Optional[ConversionConfig]):
+    """Run convert_catalog_fits_to_txt as a batch task."""
+    convert_catalog_fits_to_txt(input_filename, output_filename, config)
+
+
+jobs: Dict[str, Tuple[Callable, Callable]] = {
+    "pawprint": (convert_pawprint, make_output_fits_filename),
+    "srctbl": (convert_src_table, make_txt_src_table_filename),
+    "catalog": (convert_catalog, lambda input_filename, _: make_txt_catalog_filename(input_filename)),
+}
+
+
+class Task(NamedTuple):
+    """A single input file (and its pawprint) converted by one of the workers."""
+
+    job: str
+    input_filename: str
+    pawprint: Optional[int] = None
+
+    @property
+    def name(self) -> str:
+        """Unique name of the task used by its lease and marker files."""
+        path = os.path.abspath(self.input_filename)
+        digest = hashlib.sha1(f"{self.job}:{path}:{self.pawprint}".encode()).hexdigest()[:12]
+        suffix = "" if self.pawprint is None else f"-p{self.pawprint}"
+
+        return f"{Path(path).name}{suffix}.{digest}"
+
+
+def make_tasks(job: str, input_filenames: Iterable[str], pawprints: Optional[Iterable[int]] = None) -> List[Task]:
+    """Prepare tasks for all input files. Pawprints are used by "pawprint" and "srctbl" jobs."""
+    if job not in jobs:
+        raise ValueError(f"Unknown job {job!r}, valid jobs are: {', '.join(jobs)}")
+
+    if job == "catalog":
+        return [Task(job, filename) for filename in input_filenames]
+
+    pawprints = list(range(1, 33) if pawprints is None else pawprints)
+
+    return [Task(job, filename, pawprint) for filename in input_filenames for pawprint in pawprints]
+
+
+def make_lease(token: str) -> str:
+    """Prepare content of a lease file which identifies its owner."""
+    return json.dumps({"host": socket.gethostname(), "pid": os.getpid(), "token": token, "time": time()})
+
+
+def read_lease_token(lease_filename: str) -> Optional[str]:
+    """Read the token of an owner of a lease. Return None if the lease can't be read."""
+    try:
+        with open(lease_filename) as file_descriptor:
+            return json.load(file_descriptor)["token"]
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def create_lease(lease_filename: str, token: str) -> bool:
+    """Create a lease file if it doesn't exist. The file is created atomically."""
+    try:
+        file_descriptor = os.open(lease_filename, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644)
+    except FileExistsError:
+        return False
+
+    with os.fdopen(file_descriptor, "w") as lease:
+        lease.write(make_lease(token))
+
+    return True
+
+
+def reclaim_stale_lease(lease_filename: str, token: str, lease_timeout: float) -> bool:
+    """Take over a lease which hasn't been refreshed for lease_timeout seconds."""
+    try:
+        if time() - os.stat(lease_filename).st_mtime < lease_timeout:
+            return False
+    except FileNotFoundError:
+        return create_lease(lease_filename, token)
+
+    stale_token = read_lease_token(lease_filename)
+    stale_filename = f"{lease_filename}.{token}.stale"
+
+    try:
+        os.rename(lease_filename, stale_filename)
+    except FileNotFoundError:
+        return False
+
+    if read_lease_token(stale_filename) != stale_token or time() - os.stat(stale_filename).st_mtime < lease_timeout:
+        os.rename(stale_filename, lease_filename)
+        return False
+
+    os.unlink(stale_filename)
+
+    return create_lease(lease_filename, token)
+
+
+def refresh_lease(lease_filename: str, interval: float, stop: Event) -> None:
+    """Update modification time of a lease until the stop event is set."""
+    while not stop.wait(interval):
+        try:
+            os.utime(lease_filename)
+        except FileNotFoundError:
+            return
+
+
+def mark_failed_task(failed_filename: str, token: str, error: Exception) -> None:
+    """Record the error of a failed task in its marker file."""
+    lease = json.loads(make_lease(token))
+    lease["error"] = f"{type(error).__name__}: {error}"
+
+    with open(failed_filename, "w") as marker:
+        marker.write(json.dumps(lease))
+
+
+def run_task(task: Task, output_filename: str, token: str, config: Optional[ConversionConfig]) -> None:
+    """Convert a file to a temporary output and move it to the final place."""
+    temporary_filename = os.path.join(
+        os.path.dirname(os.path.abspath(output_filename)), f".{Path(output_filename).name}.{token}.tmp"
+    )
+
+    try:
+        jobs[task.job][0](task.input_filename, task.pawprint, temporary_filename, config)
+        os.replace(temporary_filename, output_filename)
+    finally:
+        if os.path.exists(temporary_filename):
+            os.unlink(temporary_filename)
+
+
+def run_batch(
+    job: str,
+    input_filenames: Iterable[str],
+    work_dir: str,
+    pawprints: Optional[Iterable[int]] = None,
+    output_dir: Optional[str] = None,
+    lease_timeout: float = default_lease_timeout,
+    config: Optional[ConversionConfig] = None,
+) -> List[str]:
+    """
+    Convert files claimed by this worker. Other workers running the same batch share the work.
+
+    Parameters
+    ----------
+    job : str
+        Type of the conversion: "pawprint", "srctbl" or "catalog".
+    input_filenames : iterable of str
+        Names (or paths) of the input files.
+    work_dir : str
+        Directory shared by all workers which stores
+        lease files and markers of finished tasks.
+    pawprints : iterable of int, optional
+        Numbers of pawprints extracted or converted from each
+        file by "pawprint" and "srctbl" jobs. The default is None.
+        If None all 32 pawprints are used.
+    output_dir : str, optional
+        Directory of the output files. The default is None.
+        If None the output files are saved next to input files.
+    lease_timeout : float, optional
+        Time in seconds after which a lease not refreshed by
+        its owner is taken over. The default is 600.
+    config : ConversionConfig, optional
+        Config passed to each conversion. The default is None.
+
+    Returns
+    -------
+    list of str
+        Names of the output files written by this worker.
+
+
+    Notes
+    -----
+    Leases are refreshed four times per lease_timeout, so the
+    timeout should be much longer than a delay of the shared
+    file system. A failed task releases its lease and gets a
+    ".failed" marker with the error message in the work
+    directory. Workers skip such tasks, remove the marker
+    to retry the task in the next run of the batch.
+
+    Examples
+    --------
+    >>> from vphasfits.batch import run_batch
+    >>> from glob import glob
+    >>> # Run the same call on each node
+    >>> run_batch("catalog", glob("/mnt/vphas/PSC/*.fits"), "/mnt/vphas/work", output_dir="/mnt/vphas/txt")
+    """
+    os.makedirs(work_dir, exist_ok=True)
+    output_filenames = []
+
+    for task in make_tasks(job, input_filenames, pawprints):
+        done_filename = os.path.join(work_dir, f"{task.name}.done")
+        failed_filename = os.path.join(work_dir, f"{task.name}.failed")
+        lease_filename = os.path.join(work_dir, f"{task.name}.lease")
+        token = uuid4().hex
+
+        if os.path.exists(done_filename) or os.path.exists(failed_filename):
+            continue
+
+        if not (create_lease(lease_filename, token) or reclaim_stale_lease(lease_filename, token, lease_timeout)):
+            continue
+
+        if os.path.exists(done_filename) or os.path.exists(failed_filename):
+            os.unlink(lease_filename)
+            continue
+
+        output_filename = jobs[task.job][1](task.input_filename, task.pawprint)
+        if output_dir is not None:
+            output_filename = os.path.join(output_dir, Path(output_filename).name)
+
+        stop = Event()
+        heartbeat = Thread(target=refresh_lease, args=(lease_filename, lease_timeout / 4, stop), daemon=True)
+        heartbeat.start()
+
+        try:
+            run_task(task, output_filename, token, config)
+
+            with open(done_filename, "w") as marker:
+                marker.write(make_lease(token))
+
+            output_filenames.append(output_filename)
+        except Exception as error:
+            mark_failed_task(failed_filename, token, error)
+        finally:
+            stop.set()
+            heartbeat.join()
+
+            if read_lease_token(lease_filename) == token:
+                os.unlink(lease_filename)
+
+    return output_filenames
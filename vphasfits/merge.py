@@ -0,0 +1,203 @@
+"""
+Merging of overlapping catalogs from the VPHAS+ survey.
+
+Provides one class and one function:
+  - SourceIDIndex, a compact hash set of source identifiers
+  - Merge catalogs to a single text file without repeated sources
+
+Adjacent fields overlap, so the same source can be found in many
+catalogs. Catalogs are streamed chunk by chunk and each source is
+written only the first time its identifier is seen. Identifiers are
+kept as fixed-width byte strings in an open-addressing hash table, so
+each source takes tens of bytes instead of over a hundred bytes used by
+a Python string in a set.
+
+"""
+from typing import Optional, Sequence
+
+from numpy import arange, asarray, bytes_, concatenate, empty, ndarray, ones, uint8, uint64, unique, zeros
+
+from vphasfits.statistics import ColumnStatistics
+from vphasfits.vphaslib import (
+    ConversionConfig,
+    format_chunk,
+    get_catalog_fits_records,
+    iter_record_chunks,
+    make_catalog_config,
+    make_column_statistics,
+    open_txt_output,
+)
+
+fnv_offset = uint64(0xCBF29CE484222325)
+fnv_prime = uint64(0x100000001B3)
+default_capacity = 1 << 16
+max_load_factor = 0.5
+
+
+def hash_keys(keys: ndarray) -> ndarray:
+    """Compute 64-bit FNV-1a hashes of fixed-width byte keys. Each byte column is processed for all keys at once."""
+    codes = keys.view(uint8).reshape(len(keys), keys.dtype.itemsize)
+    hashes = empty(len(keys), dtype=uint64)
+    hashes[:] = fnv_offset
+
+    for column in range(codes.shape[1]):
+        hashes ^= codes[:, column]
+        hashes *= fnv_prime
+
+    return hashes
+
+
+class SourceIDIndex:
+    """Set of source identifiers stored as fixed-width byte strings in an open-addressing hash table."""
+
+    def __init__(self, capacity: int = default_capacity, width: int = 1):
+        self.capacity = 1 << max(capacity - 1, 1).bit_length()
+        self.keys = zeros(self.capacity, dtype=f"S{width}")
+        self.used = zeros(self.capacity, dtype=bool)
+        self.size = 0
+
+    def __len__(self) -> int:
+        return self.size
+
+    @property
+    def width(self) -> int:
+        """Number of bytes of each stored identifier."""
+        return self.keys.dtype.itemsize
+
+    def rehash(self, capacity: int, width: int) -> None:
+        """Move stored identifiers to a table with a new capacity or width of keys."""
+        stored = self.keys[self.used].astype(f"S{width}")
+        self.capacity = capacity
+        self.keys = zeros(capacity, dtype=f"S{width}")
+        self.used = zeros(capacity, dtype=bool)
+        self.size = 0
+        self.insert(stored)
+
+    def insert(self, keys: ndarray) -> ndarray:
+        """Insert distinct keys of the table width. Return a mask of keys which weren't stored before."""
+        mask = uint64(self.capacity - 1)
+        slots = hash_keys(keys) & mask
+        inserted = zeros(len(keys), dtype=bool)
+        pending = arange(len(keys))
+
+        while len(pending):
+            pending_slots = slots[pending]
+            occupied = self.used[pending_slots]
+
+            found = occupied & (self.keys[pending_slots] == keys[pending])
+            collided = occupied & ~found
+            free = pending[~occupied]
+
+            _, first = unique(slots[free], return_index=True)
+            winners = free[first]
+            self.keys[slots[winners]] = keys[winners]
+            self.used[slots[winners]] = True
+            inserted[winners] = True
+
+            slots[pending[collided]] = (slots[pending[collided]] + uint64(1)) & mask
+            waiting = ones(len(free), dtype=bool)
+            waiting[first] = False
+            pending = concatenate((pending[collided], free[waiting]))
+
+        self.size += int(inserted.sum())
+
+        return inserted
+
+    def add(self, identifiers: Sequence) -> ndarray:
+        """
+        Add identifiers to the index. Return a mask of identifiers seen for the first time,
+        i.e. missing in the index and not repeated earlier in the same sequence.
+        """
+        keys = asarray(identifiers).astype(bytes_)
+        new = zeros(len(keys), dtype=bool)
+
+        if not len(keys):
+            return new
+
+        if keys.dtype.itemsize > self.width:
+            self.rehash(self.capacity, keys.dtype.itemsize)
+
+        distinct, first = unique(keys.astype(f"S{self.width}"), return_index=True)
+
+        capacity = self.capacity
+        while self.size + len(distinct) > max_load_factor * capacity:
+            capacity *= 2
+        if capacity != self.capacity:
+            self.rehash(capacity, self.width)
+
+        new[first[self.insert(distinct)]] = True
+
+        return new
+
+
+def merge_catalogs(
+    catalog_fits_list: Sequence[str],
+    catalog_txt: str,
+    config: Optional[ConversionConfig] = None,
+    id_key: str = "sourceID",
+    statistics_json: Optional[str] = None,
+) -> int:
+    """
+    Merge catalogs to a single text file. Sources repeated in overlapping catalogs are written once.
+
+    Parameters
+    ----------
+    catalog_fits_list : list of str
+        Names (or paths) of FITS files with catalogs.
+    catalog_txt : str
+        Name (or path) of the output text file.
+        The "-" name writes to standard output.
+    config : ConversionConfig, optional
+        Columns and formats of the output made by
+        make_catalog_config. The default is None.
+        If None the catalog_keys are used.
+    id_key : str, optional
+        Column with identifiers of sources.
+        The default is "sourceID".
+    statistics_json : str, optional
+        Name of a JSON file with statistics of the
+        merged columns. The default is None.
+
+    Returns
+    -------
+    int
+        Number of written (unique) sources.
+
+    Notes
+    -----
+    A source is taken from the first catalog (in the order
+    of the list) which contains it. The identifiers don't
+    have to be among the output columns.
+
+    Examples
+    --------
+    >>> from glob import glob
+    >>> from vphasfits.merge import merge_catalogs
+    >>> merge_catalogs(sorted(glob("VPHASDR2_PSC_L21*.fits")), "L210-L219-cat.dat")
+    12874411
+    """
+    if config is None:
+        config = make_catalog_config()
+
+    index = SourceIDIndex()
+    rows = 0
+    statistics: Optional[ColumnStatistics] = None if statistics_json is None else make_column_statistics(config)
+
+    with open_txt_output(catalog_txt) as file_descriptor:
+        file_descriptor.write(config.header)
+
+        for catalog_fits in catalog_fits_list:
+            records = get_catalog_fits_records(catalog_fits)
+
+            for _, chunk in iter_record_chunks(records, config.chunk_size):
+                rows += len(chunk)
+                new = index.add(chunk.field(id_key))
+                if not new.all():
+                    chunk = chunk[new]
+
+                file_descriptor.write(format_chunk(chunk, config, statistics))
+
+    if statistics is not None:
+        statistics.write_json(statistics_json, inputs=list(catalog_fits_list), duplicates=rows - len(index))
+
+    return len(index)
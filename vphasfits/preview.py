@@ -0,0 +1,156 @@
+"""
+Quick-look previews of VPHAS+ multi-extension FITS images.
+
+Provides one function:
+  - Build a downsampled image of a whole pointing from a MEF image
+
+Every extension of the MEF file is read one at a time, binned N x N
+and placed on a shared canvas according to its CRPIX/CD keys. Only one
+CCD is held in memory at any moment.
+
+"""
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from astropy.io import fits
+from astropy.io.fits import PrimaryHDU
+from numpy import array, ceil, float32, floor, full, nan, ndarray, sign
+from numpy.linalg import inv
+
+preview_header_keys = ["OBJECT", "RA", "DEC", "FILTER", "DATE-OBS", "EXPTIME"]
+
+
+def make_preview_fits_filename(multi_extension_fits_filename: str) -> str:
+    """Prepare default name of FITS file which stores a preview of MEF file."""
+    suffix = ".fits"
+    file = Path(multi_extension_fits_filename)
+
+    if file.suffix != suffix:
+        multi_extension_fits_filename = str(file.with_suffix(suffix))
+
+    return multi_extension_fits_filename.replace(".fits", "-preview.fits")
+
+
+def block_bin(data: ndarray, binning: int) -> ndarray:
+    """Bin a 2D image N x N using a mean value. Edges not filling a whole block are trimmed."""
+    rows, columns = data.shape[0] // binning, data.shape[1] // binning
+    trimmed = data[: rows * binning, : columns * binning]
+
+    return trimmed.reshape(rows, binning, columns, binning).mean(axis=(1, 3), dtype=float32)
+
+
+def get_cd_matrix(header) -> ndarray:
+    """Get the CD matrix from a header of the image extension."""
+    return array([[header["CD1_1"], header["CD1_2"]], [header["CD2_1"], header["CD2_2"]]], dtype=float)
+
+
+def get_ccd_placement(header, reference_cd_inverse: ndarray) -> Tuple[ndarray, ndarray]:
+    """
+    Get position of the first pixel of a CCD and the orientation of its axes
+    in the pixel frame of a reference extension.
+    """
+    transform = reference_cd_inverse @ get_cd_matrix(header)
+    crpix = array([header["CRPIX1"], header["CRPIX2"]], dtype=float)
+    shape = array([header["NAXIS1"], header["NAXIS2"]], dtype=float)
+    corners = array([[1.0, 1.0], [shape[0], 1.0], [1.0, shape[1]], shape])
+    positions = (corners - crpix) @ transform.T
+
+    return positions.min(axis=0), sign(transform.diagonal())
+
+
+def create_mosaic_preview(multi_extension_fits_filename: str, binning: int) -> PrimaryHDU:
+    """Create a binned FITS image of all pawprints from MEF file."""
+    with fits.open(multi_extension_fits_filename) as hdu_descriptor:
+        extensions = range(1, len(hdu_descriptor))
+        reference_header = hdu_descriptor[1].header
+        reference_cd_inverse = inv(get_cd_matrix(reference_header))
+        placements: List[Tuple[ndarray, ndarray]] = [
+            get_ccd_placement(hdu_descriptor[extension].header, reference_cd_inverse) for extension in extensions
+        ]
+
+        origin = array([position for position, _ in placements]).min(axis=0)
+        end = array(
+            [
+                position + [hdu_descriptor[extension].header["NAXIS1"], hdu_descriptor[extension].header["NAXIS2"]]
+                for extension, (position, _) in zip(extensions, placements)
+            ]
+        ).max(axis=0)
+        width, height = ceil((end - origin) / binning).astype(int)
+        canvas = full((height, width), nan, dtype=float32)
+
+        for extension, (position, orientation) in zip(extensions, placements):
+            binned = block_bin(hdu_descriptor[extension].data, binning)
+            del hdu_descriptor[extension].data
+            binned = binned[:: -1 if orientation[1] < 0 else 1, :: -1 if orientation[0] < 0 else 1]
+            x, y = floor((position - origin) / binning).astype(int)
+            rows, columns = min(binned.shape[0], height - y), min(binned.shape[1], width - x)
+            canvas[y : y + rows, x : x + columns] = binned[:rows, :columns]
+
+        preview = PrimaryHDU(canvas)
+        primary_header = hdu_descriptor[0].header
+
+        for key in preview_header_keys:
+            if key in primary_header:
+                preview.header[key] = primary_header[key]
+                preview.header.comments[key] = primary_header.comments[key]
+
+        crpix = (0.5 - origin) / binning + 0.5
+        preview.header["CTYPE1"] = reference_header["CTYPE1"]
+        preview.header["CTYPE2"] = reference_header["CTYPE2"]
+        preview.header["CRVAL1"] = reference_header["CRVAL1"]
+        preview.header["CRVAL2"] = reference_header["CRVAL2"]
+        preview.header["CRPIX1"] = crpix[0]
+        preview.header["CRPIX2"] = crpix[1]
+
+        for key in ["CD1_1", "CD2_1", "CD1_2", "CD2_2"]:
+            preview.header[key] = reference_header[key] * binning
+
+        preview.header["BINNING"] = (binning, "Pixels binned along each axis")
+
+    if "OBJECT" in preview.header:
+        preview.header["OBJECT"] += "-preview"
+
+    return preview
+
+
+def mosaic_preview_from_mef(
+    multi_extension_fits_filename: str, binning: int = 8, output_fits_filename: Optional[str] = None
+) -> None:
+    """
+    Save a downsampled image of all pawprints from MEF file to a single FITS image.
+
+    Parameters
+    ----------
+    multi_extension_fits_filename : str
+        Name (or path) of the file with multi-extension
+        fits images from the VPHAS+ project.
+    binning : int, optional
+        Number of pixels binned along each axis.
+        The default is 8.
+    output_fits_filename : str, optional
+        Name (or path) of the output file which stores
+        the preview. The default is None.
+        If None the name of the output file has the same
+        name as input file with "-preview.fits" suffix.
+
+
+    Notes
+    -----
+    Each CCD is placed on the canvas using CRPIX and CD keys
+    of its extension. The WCS of the preview is an approximation
+    based on the first extension. Pixels not covered by any
+    CCD are set to NaN.
+
+    Examples
+    --------
+    >>> from vphasfits import mosaic_preview_from_mef
+    >>> mosaic_preview_from_mef("0800b.fits", 16)  # Output file: 0800b-preview.fits
+    """
+    if binning < 1:
+        raise ValueError(f"Binning must be a positive integer, got {binning}")
+
+    if output_fits_filename is None:
+        output_fits_filename = make_preview_fits_filename(multi_extension_fits_filename)
+
+    preview = create_mosaic_preview(multi_extension_fits_filename, binning)
+    preview.writeto(output_fits_filename)
@@ -0,0 +1,54 @@
+"""
+Vectorized projections between pixel and sky coordinates.
+
+Provides one function:
+  - Convert pixel coordinates to RA/DEC with the gnomonic (TAN) projection
+
+Whole columns are converted at once using the CRVAL, CRPIX and CD keys
+of an image header. Distortion terms (e.g. PV keys of the ZPN projection)
+are not applied.
+
+"""
+from typing import Any, Mapping, Tuple
+
+from numpy import arctan2, asarray, cos, degrees, float64, hypot, ndarray, radians, sin
+
+wcs_keys = ["CRVAL1", "CRVAL2", "CRPIX1", "CRPIX2", "CD1_1", "CD1_2", "CD2_1", "CD2_2"]
+
+
+def pixel_to_sky(x: Any, y: Any, wcs: Mapping[str, float]) -> Tuple[ndarray, ndarray]:
+    """
+    Convert pixel coordinates to RA/DEC.
+
+    Parameters
+    ----------
+    x, y : array_like
+        Pixel coordinates (FITS convention, the first pixel is 1).
+    wcs : mapping
+        Values of CRVAL1, CRVAL2, CRPIX1, CRPIX2, CD1_1, CD1_2,
+        CD2_1 and CD2_2 keys, e.g. a header of the image extension.
+
+    Returns
+    -------
+    tuple of numpy.ndarray
+        RA (from 0 to 360) and DEC in degrees.
+
+    Examples
+    --------
+    >>> from vphasfits.projection import pixel_to_sky
+    >>> wcs = {"CRVAL1": 275.0, "CRVAL2": -30.0, "CRPIX1": 1024.0, "CRPIX2": 2048.0,
+    ...        "CD1_1": -5.7e-5, "CD1_2": 0.0, "CD2_1": 0.0, "CD2_2": 5.7e-5}
+    >>> pixel_to_sky([1024.0, 2000.0], [2048.0, 10.0], wcs)
+    (array([275.        , 274.93568644]), array([-30.        , -30.11615017]))
+    """
+    dx = asarray(x, dtype=float64) - wcs["CRPIX1"]
+    dy = asarray(y, dtype=float64) - wcs["CRPIX2"]
+    xi = radians(wcs["CD1_1"] * dx + wcs["CD1_2"] * dy)
+    eta = radians(wcs["CD2_1"] * dx + wcs["CD2_2"] * dy)
+    ra0, dec0 = radians(wcs["CRVAL1"]), radians(wcs["CRVAL2"])
+
+    denominator = cos(dec0) - eta * sin(dec0)
+    ra = ra0 + arctan2(xi, denominator)
+    dec = arctan2(eta * cos(dec0) + sin(dec0), hypot(xi, denominator))
+
+    return degrees(ra) % 360.0, degrees(dec)
@@ -0,0 +1,275 @@
+"""
+Readers of text files written by the vphasfits package.
+
+Provides four functions:
+  - Read a text catalog (-cat.dat) to a structured array
+  - Read a text source table (-srctbl.dat) to a structured array
+  - Iterate over chunks of a text catalog
+  - Iterate over chunks of a text source table
+
+Rows are parsed in bulk as fixed-width columns. Sexagesimal RA/DEC
+columns are converted back to degrees and sentinel values to NaN.
+Files with columns wider than expected are parsed by splitting rows
+on whitespace instead.
+
+"""
+from typing import BinaryIO, Iterator, List, Optional
+
+from numpy import (
+    ascontiguousarray,
+    char,
+    concatenate,
+    dtype,
+    empty,
+    float64,
+    frombuffer,
+    nan,
+    ndarray,
+    uint8,
+    where,
+)
+
+from vphasfits.vphaslib import catalog_nan_value
+
+catalog_column_width = 15
+src_table_column_width = 12
+default_chunk_rows = 100000
+
+ra_keys = ("RA", "RAJ2000")
+dec_keys = ("DEC", "DEJ2000")
+sexagesimal_length = 12
+
+
+def read_txt_header(file_descriptor: BinaryIO) -> List[str]:
+    """Read keys of columns from a header of the text file."""
+    header = file_descriptor.readline().decode()
+
+    if not header.startswith("#"):
+        raise ValueError(f"Missing header with names of columns: {header!r}")
+
+    return header.lstrip("#").split()
+
+
+def split_fixed_width_rows(block: bytes, columns: int, width: int) -> Optional[ndarray]:
+    """
+    Split rows into cells of fixed width. Return an array of shape (rows, columns, width)
+    or None if any row doesn't match the width.
+    """
+    row_length = columns * (width + 1)
+
+    if len(block) % row_length:
+        return None
+
+    rows = frombuffer(block, dtype=uint8).reshape(-1, row_length)
+
+    if (rows[:, -1] != ord("\n")).any():
+        return None
+
+    return rows.reshape(len(rows), columns, width + 1)[:, :, :width]
+
+
+def split_whitespace_rows(block: bytes, columns: int, width: int) -> ndarray:
+    """Split rows on whitespace and align cells to the right. Return an array of shape (rows, columns, width)."""
+    cells = [row.split() for row in block.splitlines()]
+
+    if any(len(row) != columns for row in cells):
+        raise ValueError(f"Each row of the file must have {columns} columns")
+
+    width = max([width] + [len(cell) for row in cells for cell in row])
+    aligned = char.rjust(char.asarray(cells, itemsize=width), width)
+
+    return frombuffer(aligned.tobytes(), dtype=uint8).reshape(len(cells), columns, width)
+
+
+def cells_to_strings(cells: ndarray) -> ndarray:
+    """Convert cells of a single column to an array of byte strings."""
+    return ascontiguousarray(cells).view(f"S{cells.shape[1]}").ravel()
+
+
+def digits_to_numbers(digits: ndarray) -> ndarray:
+    """Convert a two-digit field of sexagesimal values to numbers."""
+    return (digits[:, 0].astype(float64) - ord("0")) * 10 + (digits[:, 1] - ord("0"))
+
+
+def parse_sexagesimal(cells: ndarray, sign_position: Optional[int]) -> ndarray:
+    """
+    Convert cells with hh:mm:ss.sss or sdd:mm:ss.ss values to decimal hours or degrees.
+    Values in other formats are set to NaN.
+    """
+    cells = cells[:, -sexagesimal_length:]
+    start = 0 if sign_position is None else sign_position + 1
+    valid = (cells[:, start + 2] == ord(":")) & (cells[:, start + 5] == ord(":"))
+    seconds = where(valid, cells_to_strings(cells[:, start + 6 :]), b"0")
+    value = (
+        digits_to_numbers(cells[:, start : start + 2])
+        + digits_to_numbers(cells[:, start + 3 : start + 5]) / 60.0
+        + seconds.astype(float64) / 3600.0
+    )
+
+    if sign_position is not None:
+        value = where(cells[:, sign_position] == ord("-"), -value, value)
+
+    return where(valid, value, nan)
+
+
+def parse_column(key: str, cells: ndarray, nan_value: Optional[float]) -> ndarray:
+    """Convert cells of a single column to floats (degrees for RA/DEC) or strings."""
+    if key in ra_keys:
+        return 15.0 * parse_sexagesimal(cells, None)
+    elif key in dec_keys:
+        return parse_sexagesimal(cells, 0)
+
+    strings = cells_to_strings(cells)
+
+    try:
+        values = strings.astype(float64)
+    except ValueError:
+        return char.strip(strings).astype(str)
+
+    if nan_value is not None:
+        values[values == nan_value] = nan
+
+    return values
+
+
+def parse_rows(block: bytes, keys: List[str], width: int, nan_value: Optional[float]) -> ndarray:
+    """Parse complete rows of a text file to a structured array."""
+    cells = split_fixed_width_rows(block, len(keys), width)
+
+    if cells is None:
+        cells = split_whitespace_rows(block, len(keys), width)
+
+    columns = [parse_column(key, cells[:, number, :], nan_value) for number, key in enumerate(keys)]
+    records = empty(len(cells), dtype=dtype([(key, column.dtype) for key, column in zip(keys, columns)]))
+
+    for key, column in zip(keys, columns):
+        records[key] = column
+
+    return records
+
+
+def iter_txt_chunks(
+    txt_filename: str, width: int, chunk_rows: int = default_chunk_rows, nan_value: Optional[float] = None
+) -> Iterator[ndarray]:
+    """Iterate over chunks of a text file written by the package. Each chunk is a structured array."""
+    with open(txt_filename, "rb") as file_descriptor:
+        keys = read_txt_header(file_descriptor)
+        block_size = chunk_rows * len(keys) * (width + 1)
+        remainder = b""
+
+        while True:
+            block = file_descriptor.read(block_size)
+
+            if not block:
+                break
+
+            block = remainder + block
+            end = block.rfind(b"\n") + 1
+            block, remainder = block[:end], block[end:]
+
+            if block:
+                yield parse_rows(block, keys, width, nan_value)
+
+        if remainder.strip():
+            yield parse_rows(remainder + b"\n", keys, width, nan_value)
+
+
+def read_txt(txt_filename: str, width: int, nan_value: Optional[float]) -> ndarray:
+    """Read a whole text file written by the package to a structured array."""
+    chunks = list(iter_txt_chunks(txt_filename, width, nan_value=nan_value))
+
+    if not chunks:
+        with open(txt_filename, "rb") as file_descriptor:
+            keys = read_txt_header(file_descriptor)
+
+        return empty(0, dtype=dtype([(key, float64) for key in keys]))
+
+    return concatenate(chunks)
+
+
+def read_catalog_txt(catalog_txt: str, nan_value: Optional[float] = catalog_nan_value) -> ndarray:
+    """
+    Read a catalog in ASCII format written by convert_catalog_fits_to_txt.
+
+    Parameters
+    ----------
+    catalog_txt : str
+        Name (or path) of the text file with a catalog.
+    nan_value : float, optional
+        A sentinel value replaced with NaN.
+        The default is 99.9999. If None
+        no values are replaced.
+
+    Returns
+    -------
+    numpy.ndarray
+        Structured array with fields named after the header
+        of the file. RAJ2000 and DEJ2000 are given in degrees.
+        Non-numerical columns are stored as strings.
+
+    Examples
+    --------
+    >>> from vphasfits.reader import read_catalog_txt
+    >>> catalog = read_catalog_txt("VPHASDR2_PSC_L213_B-1-cat.dat")
+    >>> catalog["RAJ2000"][:2]
+    array([275.695, 275.702])
+    """
+    return read_txt(catalog_txt, catalog_column_width, nan_value)
+
+
+def read_src_table_txt(src_table_txt: str, nan_value: Optional[float] = None) -> ndarray:
+    """
+    Read a source table in ASCII format written by convert_src_table_fits_to_txt.
+
+    Parameters
+    ----------
+    src_table_txt : str
+        Name (or path) of the text file with a source table.
+    nan_value : float, optional
+        A sentinel value replaced with NaN.
+        The default is None. If None
+        no values are replaced.
+
+    Returns
+    -------
+    numpy.ndarray
+        Structured array with fields named after the header
+        of the file. RA and DEC are given in degrees.
+
+    Examples
+    --------
+    >>> from vphasfits.reader import read_src_table_txt
+    >>> table = read_src_table_txt("0704a-p23-srctbl.dat")
+    >>> table.dtype.names
+    ('Sequence_number', 'RA', 'DEC', 'X_coordinate', ...)
+    """
+    return read_txt(src_table_txt, src_table_column_width, nan_value)
+
+
+def iter_catalog_txt_chunks(
+    catalog_txt: str, chunk_rows: int = default_chunk_rows, nan_value: Optional[float] = catalog_nan_value
+) -> Iterator[ndarray]:
+    """
+    Iterate over chunks of a catalog in ASCII format.
+
+    Each chunk is a structured array with at most chunk_rows rows.
+    See read_catalog_txt for the description of other parameters.
+
+    Examples
+    --------
+    >>> from vphasfits.reader import iter_catalog_txt_chunks
+    >>> bright = sum((chunk["r"] < 16.0).sum() for chunk in iter_catalog_txt_chunks("big-cat.dat"))
+    """
+    return iter_txt_chunks(catalog_txt, catalog_column_width, chunk_rows, nan_value)
+
+
+def iter_src_table_txt_chunks(
+    src_table_txt: str, chunk_rows: int = default_chunk_rows, nan_value: Optional[float] = None
+) -> Iterator[ndarray]:
+    """
+    Iterate over chunks of a source table in ASCII format.
+
+    Each chunk is a structured array with at most chunk_rows rows.
+    See read_src_table_txt for the description of other parameters.
+    """
+    return iter_txt_chunks(src_table_txt, src_table_column_width, chunk_rows, nan_value)
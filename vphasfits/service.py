@@ -0,0 +1,255 @@
+"""
+Warm conversion service of the vphasfits package.
+
+Provides two functions:
+  - Run a service which accepts jobs on a local Unix socket
+  - Submit a job to the running service
+
+The service keeps the interpreter, astropy and the cache of open FITS
+files loaded between jobs. Jobs run on an internal pool of threads.
+Messages are single lines of JSON sent over the socket.
+
+"""
+import json
+import os
+import socket
+import socketserver
+import tempfile
+from concurrent.futures import ThreadPoolExecutor, wait
+from itertools import count
+from threading import Lock, Thread
+from time import time
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple
+
+from vphasfits.vphaslib import (
+    ConversionConfig,
+    convert_catalog_fits_to_txt,
+    convert_src_table_fits_to_txt,
+    disable_fits_cache,
+    enable_fits_cache,
+    make_catalog_config,
+    make_image_config,
+    make_src_table_config,
+    pawprint_from_mef,
+)
+
+jobs: Dict[str, Tuple[Callable, Callable[[Sequence[str]], ConversionConfig]]] = {
+    "pawprint": (pawprint_from_mef, make_image_config),
+    "srctbl": (convert_src_table_fits_to_txt, make_src_table_config),
+    "catalog": (convert_catalog_fits_to_txt, make_catalog_config),
+}
+
+default_socket_path = os.path.join(tempfile.gettempdir(), f"vphasfits-{os.getuid()}.sock")
+max_history = 1000
+
+
+class ConversionService(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Unix socket server running conversion jobs on a pool of threads."""
+
+    daemon_threads = True
+
+    def __init__(self, socket_path: str = default_socket_path, workers: int = 4, cache_size: int = 16):
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+
+        self.socket_path = socket_path
+        self.executor = ThreadPoolExecutor(workers)
+        self.cache = enable_fits_cache(cache_size)
+        self.configs: Dict[Tuple[str, Tuple[str, ...]], ConversionConfig] = {}
+        self.jobs: Dict[int, Dict[str, Any]] = {}
+        self.futures: Dict[int, Any] = {}
+        self.job_ids = count(1)
+        self.lock = Lock()
+        super().__init__(socket_path, ConversionRequestHandler)
+
+    def get_config(self, job: str, keys: Optional[Sequence[str]]) -> Optional[ConversionConfig]:
+        """Get a config for the given keys. Configs are prepared once and reused by next jobs."""
+        if keys is None:
+            return None
+
+        with self.lock:
+            config_key = (job, tuple(keys))
+            if config_key not in self.configs:
+                self.configs[config_key] = jobs[job][1](keys)
+
+            return self.configs[config_key]
+
+    def submit(self, job: str, args: Sequence, kwargs: Dict[str, Any], keys: Optional[Sequence[str]]) -> int:
+        """Queue a job and return its identifier."""
+        if job not in jobs:
+            raise ValueError(f"Unknown job {job!r}, valid jobs are: {', '.join(jobs)}")
+
+        config = self.get_config(job, keys)
+        if config is not None:
+            kwargs = dict(kwargs, config=config)
+
+        with self.lock:
+            job_id = next(self.job_ids)
+            self.jobs[job_id] = {"id": job_id, "job": job, "status": "queued", "queued": time()}
+            self.futures[job_id] = self.executor.submit(self.run, job_id, job, jobs[job][0], args, kwargs)
+
+            finished = [old_id for old_id in self.jobs if old_id not in self.futures]
+            for old_id in finished[: max(len(self.jobs) - max_history, 0)]:
+                del self.jobs[old_id]
+
+        return job_id
+
+    def run(self, job_id: int, job: str, function: Callable, args: Sequence, kwargs: Dict[str, Any]) -> None:
+        """Run a job and record its status and timings."""
+        with self.lock:
+            status = self.jobs.setdefault(job_id, {"id": job_id, "job": job, "queued": time()})
+            status.update(status="running", started=time())
+
+        try:
+            function(*args, **kwargs)
+        except Exception as error:
+            status.update(status="failed", error=f"{type(error).__name__}: {error}")
+        else:
+            status.update(status="done")
+        finally:
+            status["finished"] = time()
+            status["wait_time"] = status["started"] - status["queued"]
+            status["run_time"] = status["finished"] - status["started"]
+
+            with self.lock:
+                self.futures.pop(job_id, None)
+
+    def status(self, job_id: int, block: bool = False) -> Dict[str, Any]:
+        """Get status of a job. Wait for the end of the job if block is True."""
+        future = self.futures.get(job_id)
+        if block and future is not None:
+            wait([future])
+
+        if job_id not in self.jobs:
+            raise ValueError(f"Unknown job identifier {job_id}")
+
+        return dict(self.jobs[job_id])
+
+    def handle_message(self, message: Dict[str, Any]) -> Dict[str, Any]:
+        """Handle a single request and prepare a response."""
+        action = message.get("action")
+
+        if action == "submit":
+            job_id = self.submit(
+                message["job"], message.get("args", []), message.get("kwargs", {}), message.get("keys")
+            )
+            return self.status(job_id, message.get("wait", True))
+        elif action == "status":
+            return self.status(message["id"], message.get("wait", False))
+        elif action == "info":
+            return {"cache": self.cache.info(), "jobs": len(self.jobs), "running": len(self.futures)}
+        elif action == "shutdown":
+            Thread(target=self.shutdown).start()
+            return {"status": "stopping"}
+        else:
+            raise ValueError(f"Unknown action {action!r}")
+
+    def server_close(self) -> None:
+        """Wait for queued jobs, close the cache and remove the socket."""
+        super().server_close()
+        self.executor.shutdown()
+        disable_fits_cache()
+
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+
+class ConversionRequestHandler(socketserver.StreamRequestHandler):
+    """Read JSON requests line by line and write a JSON response to each of them."""
+
+    def handle(self) -> None:
+        for line in self.rfile:
+            try:
+                response = self.server.handle_message(json.loads(line))
+            except Exception as error:
+                response = {"status": "error", "error": f"{type(error).__name__}: {error}"}
+
+            self.wfile.write(json.dumps(response).encode() + b"\n")
+            self.wfile.flush()
+
+
+def run_service(socket_path: str = default_socket_path, workers: int = 4, cache_size: int = 16) -> None:
+    """
+    Run the conversion service until it is stopped.
+
+    Parameters
+    ----------
+    socket_path : str, optional
+        Path of the Unix socket. The default is a file
+        in the temporary directory of the system.
+    workers : int, optional
+        Number of jobs running at the same time.
+        The default is 4.
+    cache_size : int, optional
+        Number of FITS files kept open between jobs.
+        The default is 16.
+
+
+    Notes
+    -----
+    The service is stopped by the "shutdown" request or
+    a keyboard interrupt. Queued jobs are finished first.
+
+    Examples
+    --------
+    >>> from vphasfits.service import run_service
+    >>> run_service(workers=8)
+    """
+    with ConversionService(socket_path, workers, cache_size) as service:
+        try:
+            service.serve_forever()
+        except KeyboardInterrupt:
+            pass
+
+
+def send_request(message: Dict[str, Any], socket_path: str = default_socket_path) -> Dict[str, Any]:
+    """Send a single request to the service and return its response."""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+        connection.connect(socket_path)
+        connection.sendall(json.dumps(message).encode() + b"\n")
+
+        with connection.makefile("rb") as file_descriptor:
+            return json.loads(file_descriptor.readline())
+
+
+def submit_job(
+    job: str,
+    *args: Any,
+    keys: Optional[Sequence[str]] = None,
+    wait: bool = True,
+    socket_path: str = default_socket_path,
+    **kwargs: Any,
+) -> Dict[str, Any]:
+    """
+    Submit a conversion job to the running service.
+
+    Parameters
+    ----------
+    job : str
+        Type of the job: "pawprint", "srctbl" or "catalog".
+    *args, **kwargs
+        Arguments of pawprint_from_mef, convert_src_table_fits_to_txt
+        or convert_catalog_fits_to_txt respectively. Paths are
+        resolved by the service, so absolute paths are recommended.
+    keys : list of str, optional
+        Keys or columns used by the job instead of
+        the default ones. The default is None.
+    wait : bool, optional
+        Wait for the end of the job. The default is True.
+    socket_path : str, optional
+        Path of the Unix socket of the service.
+
+    Returns
+    -------
+    dict
+        Identifier, status and timings of the job.
+
+    Examples
+    --------
+    >>> from vphasfits.service import submit_job
+    >>> submit_job("catalog", "/data/VPHASDR2_PSC_L213_B-1.fits")
+    {'id': 1, 'job': 'catalog', 'status': 'done', 'queued': ..., 'wait_time': 0.0001, 'run_time': 2.53}
+    """
+    message = {"action": "submit", "job": job, "args": list(args), "kwargs": kwargs, "keys": keys, "wait": wait}
+
+    return send_request(message, socket_path)
@@ -0,0 +1,121 @@
+"""
+Statistics of columns accumulated during conversion of FITS tables.
+
+Provides one class:
+  - ColumnStatistics updated chunk by chunk and saved as a JSON file
+
+For each column the number of values, the fraction of NaN values and
+the range are counted. Coordinates give bounds of the field in degrees
+and magnitude columns get histograms with fixed bins, so the statistics
+of separate chunks can simply be added.
+
+"""
+import json
+from typing import Any, Dict, Mapping, Optional, Sequence, Tuple
+
+from numpy import asarray, degrees, float64, histogram, isnan, linspace, nanmax, nanmin, ndarray
+
+magnitude_histogram_edges = linspace(8.0, 26.0, 73)
+
+
+class ColumnStatistics:
+    """Streaming statistics of columns of a table."""
+
+    def __init__(
+        self,
+        keys: Sequence[str],
+        coordinate_keys: Tuple[str, str] = ("", ""),
+        coordinate_unit: str = "deg",
+        magnitude_keys: Sequence[str] = (),
+        histogram_edges: Optional[ndarray] = None,
+    ):
+        self.keys = tuple(keys)
+        self.coordinate_keys = coordinate_keys
+        self.coordinate_unit = coordinate_unit
+        self.magnitude_keys = tuple(key for key in magnitude_keys if key in self.keys)
+        self.histogram_edges = magnitude_histogram_edges if histogram_edges is None else asarray(histogram_edges)
+        self.rows = 0
+        self.columns: Dict[str, Dict[str, Any]] = {
+            key: {"count": 0, "nan": 0, "min": None, "max": None} for key in self.keys
+        }
+        self.histograms: Dict[str, Dict[str, Any]] = {
+            key: {"counts": [0] * (len(self.histogram_edges) - 1), "underflow": 0, "overflow": 0}
+            for key in self.magnitude_keys
+        }
+
+    def update(self, columns: Mapping[str, Sequence]) -> None:
+        """Add values of a chunk of rows. Each column is given by its key."""
+        rows = 0
+
+        for key in self.keys:
+            values = asarray(columns[key])
+            rows = len(values)
+            column = self.columns[key]
+
+            if values.dtype.kind not in "fiu":
+                column["count"] += rows
+                continue
+
+            values = values.astype(float64)
+            if key in self.coordinate_keys and self.coordinate_unit == "radian":
+                values = degrees(values)
+
+            nan_values = int(isnan(values).sum())
+            column["count"] += rows - nan_values
+            column["nan"] += nan_values
+
+            if nan_values < rows:
+                minimum, maximum = float(nanmin(values)), float(nanmax(values))
+                column["min"] = minimum if column["min"] is None else min(column["min"], minimum)
+                column["max"] = maximum if column["max"] is None else max(column["max"], maximum)
+
+            if key in self.histograms:
+                self.update_histogram(key, values)
+
+        self.rows += rows
+
+    def update_histogram(self, key: str, values: ndarray) -> None:
+        """Add magnitudes of a chunk to the histogram of a column."""
+        values = values[~isnan(values)]
+        counts, _ = histogram(values, self.histogram_edges)
+        magnitudes = self.histograms[key]
+        magnitudes["counts"] = [total + count for total, count in zip(magnitudes["counts"], counts.tolist())]
+        magnitudes["underflow"] += int((values < self.histogram_edges[0]).sum())
+        magnitudes["overflow"] += int((values > self.histogram_edges[-1]).sum())
+
+    def state(self) -> Dict[str, Any]:
+        """Get accumulated values, which allow to continue the statistics later."""
+        return {"rows": self.rows, "columns": self.columns, "histograms": self.histograms}
+
+    def restore(self, state: Dict[str, Any]) -> None:
+        """Continue the statistics from accumulated values."""
+        self.rows = state["rows"]
+        self.columns = {key: dict(column) for key, column in state["columns"].items()}
+        self.histograms = {key: dict(magnitudes) for key, magnitudes in state["histograms"].items()}
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Get the statistics as a dictionary of built-in types."""
+        columns = {
+            key: {
+                "count": column["count"],
+                "nan_fraction": column["nan"] / self.rows if self.rows else 0.0,
+                "min": column["min"],
+                "max": column["max"],
+            }
+            for key, column in self.columns.items()
+        }
+        bounds = {
+            name: [self.columns[key]["min"], self.columns[key]["max"]]
+            for name, key in zip(["ra", "dec"], self.coordinate_keys)
+            if key in self.columns
+        }
+        histograms = {
+            key: dict(magnitudes, edges=self.histogram_edges.tolist()) for key, magnitudes in self.histograms.items()
+        }
+
+        return {"rows": self.rows, "columns": columns, "bounds": bounds, "histograms": histograms}
+
+    def write_json(self, json_filename: str, **metadata: Any) -> None:
+        """Save the statistics and additional metadata to a JSON file."""
+        with open(json_filename, "w") as file_descriptor:
+            json.dump(dict(metadata, **self.to_dict()), file_descriptor, indent=2)
@@ -2,20 +2,44 @@
 This module allows to play with FITS data
 from VPHASplus project https://www.vphasplus.org
 
-Provides three functions:
+Provides four functions:
   - Get a single pawprint from a MEF image
+  - Export a single pawprint from a MEF image to a NumPy file
   - Convert FITS source table to a text file
   - Convert FITS catalog to a text file
 
+Columns and keys are taken from the module-level lists by default.
+Each function accepts also an immutable ConversionConfig, so conversions
+with different columns can run concurrently in one process.
+
+Files which are read many times can be kept open in an LRU cache,
+see enable_fits_cache.
+
+The "-" name of an input file denotes standard input and the "-" name
+of an output text file denotes standard output.
+
 """
+import json
+import os
+import sys
+from collections import OrderedDict
+from contextlib import contextmanager
+from functools import partial
+from io import BytesIO
+from math import log
 from pathlib import Path
-from typing import List, Optional
+from threading import RLock
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional, Sequence, TextIO, Tuple
 
 from astropy.coordinates import SkyCoord
 from astropy.io import fits
-from astropy.io.fits import PrimaryHDU
+from astropy.io.fits import HDUList, PrimaryHDU
 from astropy.io.fits.fitsrec import FITS_rec
-from numpy import float32, isnan
+from numpy import float32, float64, full, isnan, log10, nan, ndarray
+from numpy.lib.format import open_memmap
+
+from vphasfits.projection import pixel_to_sky, wcs_keys
+from vphasfits.statistics import ColumnStatistics
 
 image_header_keys = [
     "CRVAL1",
@@ -64,6 +88,229 @@ catalog_keys = [
     "err_i",
 ]
 
+catalog_nan_value = 99.9999
+default_chunk_size = 10000
+default_block_rows = 256
+magnitude_error_factor = 2.5 / log(10.0)
+calibration_keys = {"zero_point": "MAGZPT", "extinction": "EXTINCT", "exposure_time": "EXPTIME", "airmass": "AIRMASS"}
+airmass_range_keys = ("ESO TEL AIRM START", "ESO TEL AIRM END")
+output_buffer_size = 1 << 20
+standard_stream = "-"
+
+
+class DerivedColumns(NamedTuple):
+    """
+    Columns computed from a chunk of records and a header of the table.
+
+    The compute function takes a chunk of records and a dictionary
+    of header keys. It returns an array for each of the keys.
+    Magnitude keys get histograms in statistics of the conversion.
+    The optional prepare function takes the header once, before
+    any output is written. It checks the header keys and returns
+    columns with values resolved from the header.
+    """
+
+    keys: Tuple[str, ...]
+    compute: Callable[[FITS_rec, Dict[str, Any]], Dict[str, ndarray]]
+    magnitude_keys: Tuple[str, ...] = ()
+    prepare: Optional[Callable[[Dict[str, Any]], "DerivedColumns"]] = None
+
+
+class ConversionConfig(NamedTuple):
+    """
+    Immutable set of options used by a single conversion.
+
+    Create it with make_image_config, make_src_table_config
+    or make_catalog_config and reuse it between calls.
+    """
+
+    keys: Tuple[str, ...]
+    header: str = ""
+    row_format: str = ""
+    nan_value: Optional[float] = None
+    plan: Tuple[Tuple[str, Callable[[Sequence], list]], ...] = ()
+    chunk_size: int = default_chunk_size
+    coordinate_keys: Tuple[str, str] = ("", "")
+    coordinate_unit: str = "deg"
+    magnitude_keys: Tuple[str, ...] = ()
+    derived: Tuple[DerivedColumns, ...] = ()
+
+
+class ConversionCancelled(Exception):
+    """Raised between chunks of records when a conversion has been cancelled."""
+
+
+class FitsCacheEntry(NamedTuple):
+    """Open FITS file stored in the cache."""
+
+    signature: Tuple[int, int]
+    hdu_list: HDUList
+    lock: RLock
+
+    def close(self) -> None:
+        """Close the file once no other thread reads it."""
+        with self.lock:
+            self.hdu_list.close()
+
+
+class FitsCache:
+    """
+    Size-bounded LRU cache of open FITS files.
+
+    An entry is valid as long as modification time and size
+    of the file don't change. The least recently used file
+    is closed when the cache is full. Files are closed after
+    the lock of the cache is released, as soon as threads
+    reading them release their entries.
+    """
+
+    def __init__(self, maxsize: int = 8):
+        if maxsize < 1:
+            raise ValueError(f"Size of the cache must be a positive integer, got {maxsize}")
+
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.entries: Dict[str, FitsCacheEntry] = OrderedDict()
+        self.lock = RLock()
+
+    def get(self, filename: str) -> FitsCacheEntry:
+        """Get an open FITS file. The file is opened again if it has been changed."""
+        path = str(Path(filename).resolve())
+        stat = os.stat(path)
+        signature = (stat.st_mtime_ns, stat.st_size)
+
+        removed: List[FitsCacheEntry] = []
+
+        with self.lock:
+            entry = self.entries.get(path)
+
+            if entry is not None and entry.signature == signature:
+                self.hits += 1
+                self.entries.move_to_end(path)
+                return entry
+
+            self.misses += 1
+
+            if entry is not None:
+                removed.append(self.entries.pop(path))
+
+            hdu_list = fits.open(path)
+            entry = FitsCacheEntry(signature, hdu_list, RLock())
+            self.entries[path] = entry
+
+            while len(self.entries) > self.maxsize:
+                removed.append(self.entries.popitem(last=False)[1])
+
+        for removed_entry in removed:
+            removed_entry.close()
+
+        return entry
+
+    def info(self) -> Dict[str, int]:
+        """Get statistics of the cache."""
+        with self.lock:
+            return {"hits": self.hits, "misses": self.misses, "maxsize": self.maxsize, "currsize": len(self.entries)}
+
+    def close(self) -> None:
+        """Close all files stored in the cache."""
+        with self.lock:
+            removed = list(self.entries.values())
+            self.entries.clear()
+
+        for entry in removed:
+            entry.close()
+
+    def clear(self) -> None:
+        """Close all files stored in the cache and reset its statistics."""
+        with self.lock:
+            self.close()
+            self.hits = 0
+            self.misses = 0
+
+
+fits_cache: Optional[FitsCache] = None
+
+
+def enable_fits_cache(maxsize: int = 8) -> FitsCache:
+    """
+    Keep recently used FITS files open between calls.
+
+    Parameters
+    ----------
+    maxsize : int, optional
+        Maximum number of open files. The default is 8.
+
+    Returns
+    -------
+    FitsCache
+        The cache shared by all functions of the module.
+        If the cache is already enabled, it is closed and
+        replaced by a new one.
+
+    Examples
+    --------
+    >>> from vphasfits import enable_fits_cache, disable_fits_cache
+    >>> cache = enable_fits_cache(4)
+    >>> pawprint_from_mef("0800b.fits", 7)
+    >>> pawprint_from_mef("0800b.fits", 8)
+    >>> cache.info()
+    {'hits': 1, 'misses': 1, 'maxsize': 4, 'currsize': 1}
+    >>> disable_fits_cache()
+    """
+    global fits_cache
+
+    disable_fits_cache()
+    fits_cache = FitsCache(maxsize)
+
+    return fits_cache
+
+
+def disable_fits_cache() -> None:
+    """Close all files stored in the cache and stop caching."""
+    global fits_cache
+
+    if fits_cache is not None:
+        fits_cache.close()
+        fits_cache = None
+
+
+@contextmanager
+def open_fits(filename: str) -> Iterator[HDUList]:
+    """Open a FITS file or take it from the cache if the cache is enabled. Standard input is read to memory."""
+    cache = fits_cache
+
+    if filename == standard_stream:
+        with fits.open(BytesIO(sys.stdin.buffer.read())) as hdu_descriptor:
+            yield hdu_descriptor
+    elif cache is None:
+        with fits.open(filename) as hdu_descriptor:
+            yield hdu_descriptor
+    else:
+        entry = cache.get(filename)
+        with entry.lock:
+            yield entry.hdu_list
+
+
+def open_txt_output(filename: str) -> TextIO:
+    """Open an output text file. Standard output is written in large blocks."""
+    if filename == standard_stream:
+        sys.stdout.flush()
+        return open(sys.stdout.fileno(), "w", buffering=output_buffer_size, closefd=False)
+
+    return open(filename, "w")
+
+
+@contextmanager
+def exit_on_broken_pipe() -> Iterator[None]:
+    """Exit quietly when the reader of standard output (e.g. head) closes the pipe early."""
+    try:
+        yield
+    except BrokenPipeError:
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, sys.stdout.fileno())
+        sys.exit(1)
+
 
 def make_output_fits_filename(multi_extension_fits_filename: str, pawprint_number: int) -> str:
     """Prepare default name of FITS file which stores single pawprint from MEF file."""
@@ -76,13 +323,23 @@ def make_output_fits_filename(multi_extension_fits_filename: str, pawprint_numbe
     return multi_extension_fits_filename.replace(".fits", f"-p{pawprint_number}.fits")
 
 
-def create_single_fits(multi_extension_fits_filename: str, pawprint_number: int) -> PrimaryHDU:
-    """Create a single FITS image based on MEF file."""
-    with fits.open(multi_extension_fits_filename) as hdu_descriptor:
+def make_output_npy_filename(multi_extension_fits_filename: str, pawprint_number: int) -> str:
+    """Prepare default name of NumPy file which stores single pawprint from MEF file."""
+    return str(Path(make_output_fits_filename(multi_extension_fits_filename, pawprint_number)).with_suffix(".npy"))
+
+
+def create_single_fits(
+    multi_extension_fits_filename: str, pawprint_number: int, keys: Optional[Sequence[str]] = None
+) -> PrimaryHDU:
+    """Create a single FITS image based on MEF file. By default "image_header_keys" are copied."""
+    if keys is None:
+        keys = image_header_keys
+
+    with open_fits(multi_extension_fits_filename) as hdu_descriptor:
         single_fits = PrimaryHDU(hdu_descriptor[pawprint_number].data)
-        single_fits.header = hdu_descriptor[0].header
+        single_fits.header = hdu_descriptor[0].header.copy()
 
-        for key in image_header_keys:
+        for key in keys:
             single_fits.header[key] = hdu_descriptor[pawprint_number].header[key]
             single_fits.header.comments[key] = hdu_descriptor[pawprint_number].header.comments[key]
 
@@ -115,12 +372,236 @@ def generate_source_table_format(keys: List[str]) -> str:
 
 def get_source_table_fits_records(source_table_fits: str, pawprint: int) -> FITS_rec:
     """Get records from source table FITS file."""
-    with fits.open(source_table_fits) as hdu_descriptor:
+    with open_fits(source_table_fits) as hdu_descriptor:
         records = hdu_descriptor[pawprint].data
 
     return records
 
 
+def merge_headers(hdu_descriptor: HDUList, extension: int) -> Dict[str, Any]:
+    """Merge keys of an extension header with keys of the primary header missing in the extension."""
+    header = dict(hdu_descriptor[0].header)
+    header.update(hdu_descriptor[extension].header)
+
+    return header
+
+
+def get_fits_header(fits_filename: str, extension: int) -> Dict[str, Any]:
+    """Get keys of an extension header. Keys missing in the extension are taken from the primary header."""
+    with open_fits(fits_filename) as hdu_descriptor:
+        header = merge_headers(hdu_descriptor, extension)
+
+    return header
+
+
+def get_source_table_fits_records_and_header(
+    source_table_fits: str, pawprint: int, with_header: bool = True
+) -> Tuple[FITS_rec, Optional[Dict[str, Any]]]:
+    """Get records and merged header keys from source table FITS file, opened once (e.g. from standard input)."""
+    with open_fits(source_table_fits) as hdu_descriptor:
+        records = hdu_descriptor[pawprint].data
+        header = merge_headers(hdu_descriptor, pawprint) if with_header else None
+
+    return records, header
+
+
+def get_pawprint_wcs(multi_extension_fits_filename: str, pawprint_number: int) -> Dict[str, float]:
+    """Get CRVAL, CRPIX and CD keys of a pawprint from MEF image."""
+    header = get_fits_header(multi_extension_fits_filename, pawprint_number)
+
+    return {key: header[key] for key in wcs_keys}
+
+
+def compute_sky_columns(
+    chunk: FITS_rec,
+    header: Dict[str, Any],
+    wcs: Optional[Dict[str, float]],
+    x_key: str,
+    y_key: str,
+    keys: Tuple[str, str],
+) -> Dict[str, ndarray]:
+    """Compute RA/DEC in degrees from pixel coordinates of a chunk of records."""
+    ra, dec = pixel_to_sky(chunk.field(x_key), chunk.field(y_key), header if wcs is None else wcs)
+
+    return {keys[0]: ra.round(7), keys[1]: dec.round(7)}
+
+
+def make_sky_columns(
+    wcs: Optional[Dict[str, float]] = None,
+    x_key: str = "X_coordinate",
+    y_key: str = "Y_coordinate",
+    keys: Tuple[str, str] = ("RA_TAN", "DEC_TAN"),
+) -> DerivedColumns:
+    """
+    Prepare RA/DEC columns projected from pixel coordinates of a source table.
+
+    Parameters
+    ----------
+    wcs : dict, optional
+        Values of CRVAL, CRPIX and CD keys, e.g. returned by
+        get_pawprint_wcs for the matching image extension.
+        The default is None. If None the keys are taken from
+        the header of the source table extension.
+    x_key, y_key : str, optional
+        Columns with pixel coordinates.
+        The defaults are "X_coordinate" and "Y_coordinate".
+    keys : tuple of str, optional
+        Names of the derived columns.
+        The default is ("RA_TAN", "DEC_TAN").
+
+    Returns
+    -------
+    DerivedColumns
+        Columns with RA/DEC in degrees, which can be passed
+        to make_src_table_config.
+
+    Examples
+    --------
+    >>> from vphasfits import convert_src_table_fits_to_txt, make_src_table_config, make_sky_columns
+    >>> from vphasfits.vphaslib import get_pawprint_wcs
+    >>> sky = make_sky_columns(get_pawprint_wcs("0704a-image.fits", 23))
+    >>> convert_src_table_fits_to_txt("0704a.fits", 23, config=make_src_table_config(derived=[sky]))
+    """
+    return DerivedColumns(
+        tuple(keys), partial(compute_sky_columns, wcs=wcs, x_key=x_key, y_key=y_key, keys=tuple(keys))
+    )
+
+
+def get_calibration(header: Dict[str, Any], calibration: Dict[str, Optional[float]]) -> Dict[str, float]:
+    """
+    Complete calibration values missing in the given dictionary with header keys.
+    The airmass can be also taken as the mean of ESO TEL AIRM START and END keys.
+    """
+    values = {}
+
+    for name, key in calibration_keys.items():
+        if calibration[name] is not None:
+            values[name] = calibration[name]
+        elif key in header:
+            values[name] = header[key]
+        elif name == "airmass" and all(airmass_key in header for airmass_key in airmass_range_keys):
+            values[name] = sum(header[airmass_key] for airmass_key in airmass_range_keys) / 2.0
+        else:
+            raise KeyError(f"Missing {key} key in the header, pass {name} explicitly")
+
+    return values
+
+
+def compute_magnitude_columns(
+    chunk: FITS_rec,
+    header: Dict[str, Any],
+    flux_key: str,
+    error_key: Optional[str],
+    keys: Tuple[str, ...],
+    calibration: Dict[str, Optional[float]],
+) -> Dict[str, ndarray]:
+    """
+    Compute calibrated magnitudes (and their errors) of a chunk of records. Non-positive fluxes give NaN.
+    Calibration values are taken from the header unless they have been resolved by resolve_magnitude_columns.
+    """
+    values = get_calibration(header, calibration)
+    flux = chunk.field(flux_key).astype(float64)
+    positive = flux > 0.0
+    magnitudes = full(len(flux), nan)
+    magnitudes[positive] = (
+        values["zero_point"]
+        - 2.5 * log10(flux[positive] / values["exposure_time"])
+        - values["extinction"] * (values["airmass"] - 1.0)
+    )
+    columns = {keys[0]: magnitudes.round(4)}
+
+    if error_key is not None:
+        errors = full(len(flux), nan)
+        errors[positive] = magnitude_error_factor * chunk.field(error_key)[positive] / flux[positive]
+        columns[keys[1]] = errors.round(4)
+
+    return columns
+
+
+def resolve_magnitude_columns(
+    header: Dict[str, Any],
+    flux_key: str,
+    error_key: Optional[str],
+    keys: Tuple[str, ...],
+    calibration: Dict[str, Optional[float]],
+) -> DerivedColumns:
+    """Take calibration values missing in the given dictionary from the header once, before the conversion."""
+    return make_magnitude_columns(flux_key, error_key, keys, **get_calibration(header, calibration))
+
+
+def make_magnitude_columns(
+    flux_key: str = "Aper_flux_3",
+    error_key: Optional[str] = "Aper_flux_3_err",
+    keys: Optional[Sequence[str]] = None,
+    zero_point: Optional[float] = None,
+    extinction: Optional[float] = None,
+    exposure_time: Optional[float] = None,
+    airmass: Optional[float] = None,
+) -> DerivedColumns:
+    """
+    Prepare calibrated magnitude columns computed from flux columns of a source table.
+
+    Parameters
+    ----------
+    flux_key : str, optional
+        Column with fluxes in counts.
+        The default is "Aper_flux_3".
+    error_key : str, optional
+        Column with errors of fluxes. The default is
+        "Aper_flux_3_err". If None errors of magnitudes
+        are not computed.
+    keys : list of str, optional
+        Names of the magnitude column and its error.
+        The default is None. If None the names are made
+        from flux_key, e.g. "Aper_mag_3", "Aper_mag_3_err".
+    zero_point, extinction, exposure_time, airmass : float, optional
+        Calibration values. The defaults are None. If None
+        the values are taken from MAGZPT, EXTINCT, EXPTIME and
+        AIRMASS keys of the extension (or primary) header.
+
+    Returns
+    -------
+    DerivedColumns
+        Columns which can be passed to make_src_table_config.
+
+
+    Notes
+    -----
+    Magnitudes are computed as follows:
+        mag = MAGZPT - 2.5 log10(flux / EXPTIME) - EXTINCT (AIRMASS - 1)
+        err = 1.0857 flux_err / flux
+    Rows with non-positive fluxes get NaN magnitudes and errors.
+
+    Examples
+    --------
+    >>> from vphasfits import convert_src_table_fits_to_txt, make_src_table_config, make_magnitude_columns
+    >>> aperture = make_magnitude_columns()  # Adds Aper_mag_3 and Aper_mag_3_err columns
+    >>> peak = make_magnitude_columns("Peak_height", "Peak_height_err", zero_point=25.1, extinction=0.09)
+    >>> config = make_src_table_config(derived=[aperture, peak])
+    >>> convert_src_table_fits_to_txt("0704a.fits", 23, config=config)
+    """
+    if keys is None:
+        name = flux_key.replace("flux", "mag") if "flux" in flux_key else f"{flux_key}_mag"
+        keys = (name,) if error_key is None else (name, f"{name}_err")
+
+    keys = tuple(keys)
+    calibration = {
+        "zero_point": zero_point,
+        "extinction": extinction,
+        "exposure_time": exposure_time,
+        "airmass": airmass,
+    }
+
+    return DerivedColumns(
+        keys,
+        partial(
+            compute_magnitude_columns, flux_key=flux_key, error_key=error_key, keys=keys, calibration=calibration
+        ),
+        keys[:1],
+        partial(resolve_magnitude_columns, flux_key=flux_key, error_key=error_key, keys=keys, calibration=calibration),
+    )
+
+
 def convert_ra_to_hhmmss(value: float, unit: Optional[str] = "deg") -> str:
     """Convert RA to hh:mm:ss format."""
     coo = SkyCoord(value, 0.0, frame="icrs", unit=unit)
@@ -156,14 +637,281 @@ def generate_catalog_format(keys: List[str]) -> str:
 
 def get_catalog_fits_records(catalog_fits: str) -> FITS_rec:
     """Get records from catalog FITS file."""
-    with fits.open(catalog_fits) as hdu_descriptor:
+    with open_fits(catalog_fits) as hdu_descriptor:
         records = hdu_descriptor[1].data
 
     return records
 
 
+def format_column(values: Sequence) -> list:
+    """Pass values of a column to a text file without any change."""
+    return list(values)
+
+
+def format_ra_column(values: Sequence, unit: str) -> list:
+    """Convert RA values of a column to hh:mm:ss format."""
+    return [convert_ra_to_hhmmss(value, unit) for value in values]
+
+
+def format_dec_column(values: Sequence, unit: str) -> list:
+    """Convert DEC values of a column to dd:mm:ss format."""
+    return [convert_dec_to_ddmmss(value, unit) for value in values]
+
+
+def format_nan_column(values: Sequence, nan_value: float) -> list:
+    """Replace NaN values of a column with a sentinel value."""
+    return [nan_value if isinstance(value, float32) and isnan(value) else value for value in values]
+
+
+def make_column_plan(
+    keys: Sequence[str], ra_key: str, dec_key: str, unit: str, nan_value: Optional[float]
+) -> Tuple[Tuple[str, Callable[[Sequence], list]], ...]:
+    """Prepare a formatter for each column of a text file."""
+    plan = ()
+    for key in keys:
+        if key == ra_key:
+            plan += ((key, partial(format_ra_column, unit=unit)),)
+        elif key == dec_key:
+            plan += ((key, partial(format_dec_column, unit=unit)),)
+        elif nan_value is not None:
+            plan += ((key, partial(format_nan_column, nan_value=nan_value)),)
+        else:
+            plan += ((key, format_column),)
+
+    return plan
+
+
+def make_image_config(keys: Optional[Sequence[str]] = None) -> ConversionConfig:
+    """Prepare a config for extraction of a pawprint. By default "image_header_keys" are used."""
+    return ConversionConfig(tuple(image_header_keys if keys is None else keys))
+
+
+def make_src_table_config(
+    keys: Optional[Sequence[str]] = None,
+    nan_value: Optional[float] = None,
+    chunk_size: int = default_chunk_size,
+    derived: Sequence[DerivedColumns] = (),
+) -> ConversionConfig:
+    """
+    Prepare a config for conversion of a source table. By default "source_table_keys" are used.
+    Keys of derived columns missing in keys are appended at the end. Derived magnitudes get histograms.
+    """
+    keys = tuple(source_table_keys if keys is None else keys)
+    keys += tuple(key for columns in derived for key in columns.keys if key not in keys)
+
+    return ConversionConfig(
+        keys,
+        generate_txt_header(list(keys)),
+        generate_source_table_format(list(keys)),
+        nan_value,
+        make_column_plan(keys, "RA", "DEC", "radian", nan_value),
+        chunk_size,
+        ("RA", "DEC"),
+        "radian",
+        tuple(key for columns in derived for key in columns.magnitude_keys),
+        tuple(derived),
+    )
+
+
+def make_catalog_config(
+    keys: Optional[Sequence[str]] = None,
+    nan_value: Optional[float] = catalog_nan_value,
+    chunk_size: int = default_chunk_size,
+) -> ConversionConfig:
+    """Prepare a config for conversion of a catalog. By default "catalog_keys" are used."""
+    keys = tuple(catalog_keys if keys is None else keys)
+
+    return ConversionConfig(
+        keys,
+        generate_txt_header(list(keys)),
+        generate_catalog_format(list(keys)),
+        nan_value,
+        make_column_plan(keys, "RAJ2000", "DEJ2000", "deg", nan_value),
+        chunk_size,
+        ("RAJ2000", "DEJ2000"),
+        "deg",
+        tuple(key for key in keys if f"err_{key}" in keys),
+    )
+
+
+def prepare_derived_columns(config: ConversionConfig, header: Optional[Dict[str, Any]]) -> ConversionConfig:
+    """Prepare derived columns of a config with the header. Missing header keys are reported before any output."""
+    if not config.derived:
+        return config
+
+    derived = tuple(columns if columns.prepare is None else columns.prepare(header) for columns in config.derived)
+
+    return config._replace(derived=derived)
+
+
+def make_column_statistics(config: ConversionConfig) -> ColumnStatistics:
+    """Prepare empty statistics of columns selected by a config."""
+    return ColumnStatistics(config.keys, config.coordinate_keys, config.coordinate_unit, config.magnitude_keys)
+
+
+def iter_record_chunks(
+    records: FITS_rec, chunk_size: int, start: int = 0, cancel_event: Optional[Any] = None
+) -> Iterator[Tuple[int, FITS_rec]]:
+    """
+    Iterate over chunks of records from the start row. Each chunk comes with the index of the row after it.
+    ConversionCancelled is raised before the next chunk once the cancel event (e.g. threading.Event) is set.
+    """
+    for first in range(start, len(records), chunk_size):
+        if cancel_event is not None and cancel_event.is_set():
+            raise ConversionCancelled(f"Conversion cancelled at row {first}")
+
+        stop = min(first + chunk_size, len(records))
+        yield stop, records[first:stop]
+
+
+def get_chunk_columns(
+    chunk: FITS_rec, config: ConversionConfig, header: Optional[Dict[str, Any]] = None
+) -> Dict[str, Sequence]:
+    """Get values of all columns of a config from a chunk of records. Derived columns are computed using the header."""
+    values = {}
+    for columns in config.derived:
+        values.update(columns.compute(chunk, header))
+
+    for key in config.keys:
+        if key not in values:
+            values[key] = chunk.field(key)
+
+    return values
+
+
+def format_chunk(
+    chunk: FITS_rec,
+    config: ConversionConfig,
+    statistics: Optional[ColumnStatistics] = None,
+    header: Optional[Dict[str, Any]] = None,
+) -> str:
+    """
+    Format a chunk of records to a block of text lines. Derived columns are computed using the header.
+    Statistics, if given, are updated with the chunk before it is formatted.
+    """
+    values = get_chunk_columns(chunk, config, header)
+
+    if statistics is not None:
+        statistics.update(values)
+
+    columns = [formatter(values[key]) for key, formatter in config.plan]
+
+    return "".join(config.row_format % row for row in zip(*columns))
+
+
+def format_records(
+    records: FITS_rec,
+    config: ConversionConfig,
+    statistics: Optional[ColumnStatistics] = None,
+    header: Optional[Dict[str, Any]] = None,
+    cancel_event: Optional[Any] = None,
+) -> Iterator[str]:
+    """Format records to blocks of text lines. Each block covers a chunk of records."""
+    for _, chunk in iter_record_chunks(records, config.chunk_size, cancel_event=cancel_event):
+        yield format_chunk(chunk, config, statistics, header)
+
+
+def make_checkpoint_signature(fits_filename: str, config: ConversionConfig, statistics: bool = False) -> Dict[str, Any]:
+    """
+    Describe an input file, a config and whether statistics are collected.
+    A checkpoint is valid only for the same description.
+    """
+    stat = os.stat(fits_filename)
+
+    return {
+        "input": os.path.abspath(fits_filename),
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "keys": list(config.keys),
+        "row_format": config.row_format,
+        "nan_value": config.nan_value,
+        "statistics": statistics,
+    }
+
+
+def read_checkpoint(checkpoint: str, signature: Dict[str, Any], txt_filename: str) -> Optional[Dict[str, Any]]:
+    """Read a checkpoint. Return None if it doesn't exist or doesn't match the conversion."""
+    try:
+        with open(checkpoint) as file_descriptor:
+            state = json.load(file_descriptor)
+    except (OSError, ValueError):
+        return None
+
+    if state.get("signature") != signature:
+        return None
+
+    if not os.path.exists(txt_filename) or os.path.getsize(txt_filename) < state["offset"]:
+        return None
+
+    return state
+
+
+def write_checkpoint(checkpoint: str, state: Dict[str, Any]) -> None:
+    """Replace a checkpoint atomically."""
+    temporary_filename = f"{checkpoint}.tmp"
+
+    with open(temporary_filename, "w") as file_descriptor:
+        json.dump(state, file_descriptor)
+        file_descriptor.flush()
+        os.fsync(file_descriptor.fileno())
+
+    os.replace(temporary_filename, checkpoint)
+
+
+def write_records_with_checkpoint(
+    records: FITS_rec,
+    txt_filename: str,
+    config: ConversionConfig,
+    statistics: Optional[ColumnStatistics],
+    checkpoint: str,
+    signature: Dict[str, Any],
+    cancel_event: Optional[Any] = None,
+) -> None:
+    """
+    Write records to a text file recording the last written row after each chunk.
+    A matching checkpoint makes the conversion continue from that row.
+    """
+    state = read_checkpoint(checkpoint, signature, txt_filename)
+
+    if state is None:
+        row, offset, mode = 0, 0, "w"
+    else:
+        row, offset, mode = state["row"], state["offset"], "a"
+        os.truncate(txt_filename, offset)
+
+        if statistics is not None and state["statistics"] is not None:
+            statistics.restore(state["statistics"])
+
+    with open(txt_filename, mode) as file_descriptor:
+        if state is None:
+            file_descriptor.write(config.header)
+            offset = len(config.header.encode())
+
+        for stop, chunk in iter_record_chunks(records, config.chunk_size, row, cancel_event):
+            block = format_chunk(chunk, config, statistics)
+            file_descriptor.write(block)
+            file_descriptor.flush()
+            os.fsync(file_descriptor.fileno())
+            offset += len(block.encode())
+            write_checkpoint(
+                checkpoint,
+                {
+                    "signature": signature,
+                    "row": stop,
+                    "offset": offset,
+                    "statistics": None if statistics is None else statistics.state(),
+                },
+            )
+
+    if os.path.exists(checkpoint):
+        os.remove(checkpoint)
+
+
 def pawprint_from_mef(
-    multi_extension_fits_filename: str, pawprint_number: int, output_fits_filename: Optional[str] = None
+    multi_extension_fits_filename: str,
+    pawprint_number: int,
+    output_fits_filename: Optional[str] = None,
+    config: Optional[ConversionConfig] = None,
 ):
     """
     Save a specific pawprint from MEF file to a single FITS image.
@@ -181,28 +929,115 @@ def pawprint_from_mef(
         a single image FITS. The default is None.
         If None the name of the output file contains a proper
         pawprint number which the file comes from.
+    config : ConversionConfig, optional
+        Keys of the header copied from the extension.
+        The default is None. If None the config is
+        prepared from "image_header_keys" list.
 
 
     Notes
     -----
     To add/remove columns to/from the header FITS,
-    please edit "image_header_keys" list.
+    please edit "image_header_keys" list or pass
+    a config made by make_image_config.
 
     Examples
     --------
-    >>> from vphasfits import pawprint_from_mef, image_header_keys
+    >>> from vphasfits import pawprint_from_mef, image_header_keys, make_image_config
     >>> image_header_keys += ["PSF_FWHM"]
     >>> pawprint_from_mef("0800b.fits", 7)  # Output file: 0800b-p7.fits
+    >>> pawprint_from_mef("0800b.fits", 8, config=make_image_config(["CRVAL1", "CRVAL2"]))
     """
     if output_fits_filename is None:
         output_fits_filename = make_output_fits_filename(multi_extension_fits_filename, pawprint_number)
 
-    output_fits = create_single_fits(multi_extension_fits_filename, pawprint_number)
+    if config is None:
+        config = make_image_config()
+
+    output_fits = create_single_fits(multi_extension_fits_filename, pawprint_number, config.keys)
     output_fits.writeto(output_fits_filename)
 
 
+def pawprint_to_npy(
+    multi_extension_fits_filename: str,
+    pawprint_number: int,
+    output_npy_filename: Optional[str] = None,
+    config: Optional[ConversionConfig] = None,
+    block_rows: int = default_block_rows,
+) -> None:
+    """
+    Save a specific pawprint from MEF file to a NumPy file with a JSON sidecar.
+
+    Parameters
+    ----------
+    multi_extension_fits_filename : str
+        Name (or path) of the file with multi-extension
+        fits images from the VPHAS+ project.
+    pawprint_number : int
+        A number indicating the specific pawprint.
+        Valid values are from 1 to 32.
+    output_npy_filename : str, optional
+        Name (or path) of the output .npy file. The default
+        is None. If None the name of the output file contains
+        a proper pawprint number which the file comes from.
+        Header keys are saved next to it with ".json" suffix.
+    config : ConversionConfig, optional
+        Keys of the header saved to the sidecar.
+        The default is None. If None the config is
+        prepared from "image_header_keys" list.
+    block_rows : int, optional
+        Number of rows converted at once. The default is 256.
+
+
+    Notes
+    -----
+    Pixels are scaled (BSCALE/BZERO) and converted to native-endian
+    float32 block by block while they are written, so the array
+    can be loaded without copying: np.load(name, mmap_mode="r").
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> from vphasfits.vphaslib import pawprint_to_npy
+    >>> pawprint_to_npy("0800b.fits", 7)  # Output files: 0800b-p7.npy, 0800b-p7.json
+    >>> pixels = np.load("0800b-p7.npy", mmap_mode="r")
+    """
+    if output_npy_filename is None:
+        output_npy_filename = make_output_npy_filename(multi_extension_fits_filename, pawprint_number)
+
+    if config is None:
+        config = make_image_config()
+
+    with open_fits(multi_extension_fits_filename) as hdu_descriptor:
+        hdu = hdu_descriptor[pawprint_number]
+        shape = (hdu.header["NAXIS2"], hdu.header["NAXIS1"])
+        keys = {key: hdu.header[key] for key in config.keys}
+        pixels = open_memmap(output_npy_filename, mode="w+", dtype=float32, shape=shape)
+
+        for first in range(0, shape[0], block_rows):
+            pixels[first : first + block_rows] = hdu.section[first : first + block_rows, :]
+
+        pixels.flush()
+        del pixels
+
+    sidecar = {
+        "input": multi_extension_fits_filename,
+        "pawprint": pawprint_number,
+        "shape": list(shape),
+        "header": keys,
+    }
+
+    with open(str(Path(output_npy_filename).with_suffix(".json")), "w") as file_descriptor:
+        json.dump(sidecar, file_descriptor, indent=2)
+
+
 def convert_src_table_fits_to_txt(
-    src_table_fits: str, pawprint_number: int, src_table_txt: Optional[str] = None
+    src_table_fits: str,
+    pawprint_number: int,
+    src_table_txt: Optional[str] = None,
+    config: Optional[ConversionConfig] = None,
+    statistics_json: Optional[str] = None,
+    cancel_event: Optional[Any] = None,
 ) -> None:
     """
     Save a source table with raw data in FITS format to a text file.
@@ -212,6 +1047,7 @@ def convert_src_table_fits_to_txt(
     src_table_fits : str
         Name (or path) of the file with multi-extension
         fits source table from the VPHAS+ project.
+        If "-" the file is read from standard input.
     pawprint_number : int
         A number indicating the specific pawprint.
         Valid values are from 1 to 32.
@@ -220,14 +1056,30 @@ def convert_src_table_fits_to_txt(
         source table in ASCII format. The default is None.
         If None the name of the output file contains a proper
         pawprint number which the file comes from and the
-        "-srctbl.dat" suffix.
+        "-srctbl.dat" suffix. If "-" the rows are written
+        to standard output.
+    config : ConversionConfig, optional
+        Columns, format of rows and NaN sentinel of the output.
+        The default is None. If None the config is
+        prepared from "source_table_keys" list.
+    statistics_json : str, optional
+        Name (or path) of a JSON file which stores counts,
+        NaN fractions and ranges of columns collected during
+        the conversion. The default is None. If None the
+        statistics are not collected.
+    cancel_event : threading.Event, optional
+        An event checked between chunks of records. The default
+        is None. Once the event is set, ConversionCancelled is
+        raised.
 
 
     Notes
     -----
     To add/remove columns to/from the text file, please
     edit "source_table_keys" list. This also allows to change
-    the order of columns.
+    the order of columns. To convert files with different
+    columns at the same time, pass configs made by
+    make_src_table_config instead.
 
     Examples
     --------
@@ -235,31 +1087,41 @@ def convert_src_table_fits_to_txt(
     >>> source_table_keys.remove("DEC")
     >>> source_table_keys += ["Aper_flux_4", "Aper_flux_4_err"]
     >>> convert_src_table_fits_to_txt("0704a.fits", 23)  # Output file: 0704a-p23-srctbl.dat
+    >>> config = make_src_table_config(["Sequence_number", "RA", "DEC"])
+    >>> convert_src_table_fits_to_txt("0704a.fits", 24, config=config)
+    >>> config = make_src_table_config(derived=[make_sky_columns()])  # Adds RA_TAN and DEC_TAN columns
+    >>> convert_src_table_fits_to_txt("0704a.fits", 25, config=config)
     """
-    if src_table_txt is None:
+    if src_table_txt is None and src_table_fits == standard_stream:
+        src_table_txt = standard_stream
+    elif src_table_txt is None:
         src_table_txt = make_txt_src_table_filename(src_table_fits, pawprint_number)
 
-    src_table_header = generate_txt_header(source_table_keys)
-    src_table_format = generate_source_table_format(source_table_keys)
-    records = get_source_table_fits_records(src_table_fits, pawprint_number)
+    if config is None:
+        config = make_src_table_config()
+
+    records, header = get_source_table_fits_records_and_header(src_table_fits, pawprint_number, bool(config.derived))
+    config = prepare_derived_columns(config, header)
+    statistics = None if statistics_json is None else make_column_statistics(config)
 
-    with open(src_table_txt, "w") as file_descriptor:
-        file_descriptor.write(src_table_header)
+    with open_txt_output(src_table_txt) as file_descriptor:
+        file_descriptor.write(config.header)
 
-        for record in records:
-            row = ()
-            for key in source_table_keys:
-                if key == "RA":
-                    row += (convert_ra_to_hhmmss(record.field(key), "radian"),)
-                elif key == "DEC":
-                    row += (convert_dec_to_ddmmss(record.field(key), "radian"),)
-                else:
-                    row += (record.field(key),)
+        for block in format_records(records, config, statistics, header, cancel_event):
+            file_descriptor.write(block)
 
-            file_descriptor.write(src_table_format % row)
+    if statistics is not None:
+        statistics.write_json(statistics_json, input=src_table_fits, pawprint=pawprint_number)
 
 
-def convert_catalog_fits_to_txt(catalog_fits: str, catalog_txt: Optional[str] = None) -> None:
+def convert_catalog_fits_to_txt(
+    catalog_fits: str,
+    catalog_txt: Optional[str] = None,
+    config: Optional[ConversionConfig] = None,
+    statistics_json: Optional[str] = None,
+    checkpoint: Optional[str] = None,
+    cancel_event: Optional[Any] = None,
+) -> None:
     """
     Save a catalog with data in FITS format to a text file.
 
@@ -268,18 +1130,42 @@ def convert_catalog_fits_to_txt(catalog_fits: str, catalog_txt: Optional[str] =
     catalog_fits : str
         Name (or path) of the file with multi-extension
         fits catalog from the VPHAS+ project.
+        If "-" the file is read from standard input.
     catalog_txt : str, optional
         Name (or path) of the output file which stores
         catalog in ASCII format. The default is None.
         If None the name of the output file has the same
-        name as input file with "-cat.dat" suffix.
+        name as input file with "-cat.dat" suffix. If "-"
+        the rows are written to standard output.
+    config : ConversionConfig, optional
+        Columns, format of rows and NaN sentinel of the output.
+        The default is None. If None the config is
+        prepared from "catalog_keys" list.
+    statistics_json : str, optional
+        Name (or path) of a JSON file which stores counts,
+        NaN fractions and ranges of columns, RA/DEC bounds
+        and histograms of magnitudes collected during the
+        conversion. The default is None. If None the
+        statistics are not collected.
+    checkpoint : str, optional
+        Name (or path) of a file which records the last written
+        row after each chunk. The default is None. If the file
+        matches the conversion, the output is truncated to the
+        recorded size and the conversion continues from the
+        recorded row. The file is removed at the end.
+    cancel_event : threading.Event, optional
+        An event checked between chunks of records. The default
+        is None. Once the event is set, ConversionCancelled is
+        raised; the checkpoint, if given, allows to continue.
 
 
     Notes
     -----
     To add/remove columns to/from the text file, please
     edit "catalog_keys" list. This also allows to change
-    the order of columns.
+    the order of columns. To convert files with different
+    columns at the same time, pass configs made by
+    make_catalog_config instead.
 
     Examples
     --------
@@ -288,28 +1174,34 @@ def convert_catalog_fits_to_txt(catalog_fits: str, catalog_txt: Optional[str] =
     >>> catalog_keys
     >>> ['RAJ2000', 'DEJ2000', 'u', 'err_u', 'g', 'err_g', 'r2', 'err_r2', 'ha', 'err_ha', 'r', 'err_r', 'i', 'err_i']
     >>> convert_catalog_fits_to_txt("VPHASDR2_PSC_L213_B-1.fits")  # Output file: VPHASDR2_PSC_L213_B-1-cat.dat
+    >>> config = make_catalog_config(["sourceID", "RAJ2000", "DEJ2000"], nan_value=-1.0)
+    >>> convert_catalog_fits_to_txt("VPHASDR2_PSC_L213_B-2.fits", config=config)
+    >>> convert_catalog_fits_to_txt("VPHASDR2_PSC_L213_B-3.fits", statistics_json="L213_B-3-stats.json")
+    >>> convert_catalog_fits_to_txt("VPHASDR2_PSC_L213_B-4.fits", checkpoint="L213_B-4.ckpt")  # Run again if killed
     """
-    if catalog_txt is None:
+    if catalog_txt is None and catalog_fits == standard_stream:
+        catalog_txt = standard_stream
+    elif catalog_txt is None:
         catalog_txt = make_txt_catalog_filename(catalog_fits)
 
-    catalog_header = generate_txt_header(catalog_keys)
-    catalog_format = generate_catalog_format(catalog_keys)
+    if config is None:
+        config = make_catalog_config()
+
+    if checkpoint is not None and standard_stream in (catalog_fits, catalog_txt):
+        raise ValueError("Checkpoints require named input and output files")
+
     records = get_catalog_fits_records(catalog_fits)
+    statistics = None if statistics_json is None else make_column_statistics(config)
+
+    if checkpoint is None:
+        with open_txt_output(catalog_txt) as file_descriptor:
+            file_descriptor.write(config.header)
+
+            for block in format_records(records, config, statistics, cancel_event=cancel_event):
+                file_descriptor.write(block)
+    else:
+        signature = make_checkpoint_signature(catalog_fits, config, statistics is not None)
+        write_records_with_checkpoint(records, catalog_txt, config, statistics, checkpoint, signature, cancel_event)
 
-    with open(catalog_txt, "w") as file_descriptor:
-        file_descriptor.write(catalog_header)
-
-        for record in records:
-            row = ()
-            for key in catalog_keys:
-                if key == "RAJ2000":
-                    row += (convert_ra_to_hhmmss(record.field(key)),)
-                elif key == "DEJ2000":
-                    row += (convert_dec_to_ddmmss(record.field(key)),)
-                else:
-                    field = record.field(key)
-                    if isinstance(field, float32) and isnan(field):
-                        field = 99.9999
-                    row += (field,)
-
-            file_descriptor.write(catalog_format % row)
+    if statistics is not None:
+        statistics.write_json(statistics_json, input=catalog_fits)